@@ -1,18 +1,8 @@
 # pages/2_add_project.py
 import streamlit as st
-from datetime import datetime
-from utils.auth_simple import check_login
+from utils.auth_simple import bootstrap_page
 from utils.common import *
-st.set_page_config(page_title="Plánovač HK", layout="wide")
-# Kontrola přihlášení
-if not check_login():
-    st.switch_page("Home.py")
-    st.stop()
-# Základní uživatelské info
-username = st.session_state.get("username", "neznámý")
-name = st.session_state.get("name", "Uživatel")
-role = st.session_state.get("role", "viewer")
-render_sidebar("Přidat projekt / úkol")
+username, name, role, read_only = bootstrap_page("Přidat projekt / úkol")
 st.header("Přidat projekt a úkol")
 if role == "viewer":
     st.error("Tato stránka je dostupná jen pro administrátory a běžné uživatele.")
@@ -81,7 +71,6 @@ with col1:
                         if success:
                             st.session_state["project_added_success"] = True
                             st.session_state["project_added_id"] = proj_id_clean
-                            st.cache_data.clear()
                             st.rerun()
                         else:
                             st.error("Nepodařilo se uložit projekt do databáze.")
@@ -136,7 +125,7 @@ with col2:
         with colA:
             parent_id = None
             if project_id:
-                possible_parents = get_tasks(project_id)
+                possible_parents = get_project_tasks(project_id)
                 parent_options = ["Žádný (root)"] + [
                     f"P{project_id} - {get_workplace_name(t['workplace_id'])} | "
                     f"Start: {yyyymmdd_to_ddmmyyyy(t['start_date']) or 'bez data'} | "
@@ -195,26 +184,10 @@ with col2:
                         calculate_end_date(start_yyyymmdd, float(hours), capacity_mode)
                         if start_yyyymmdd else None
                     )
-                    conflict_in_project = False
-                    if start_yyyymmdd and temp_end:
-                        existing = (
-                            supabase.table("tasks")
-                            .select("id, start_date, end_date")
-                            .eq("project_id", project_id)
-                            .eq("workplace_id", wp_id)
-                            .not_.is_("start_date", "null")
-                            .not_.is_("end_date", "null")
-                            .execute()
-                            .data
-                        )
-                        new_start = datetime.strptime(start_yyyymmdd, "%Y-%m-%d").date()
-                        new_end = datetime.strptime(temp_end, "%Y-%m-%d").date()
-                        for ex in existing:
-                            ex_start = datetime.strptime(ex["start_date"], "%Y-%m-%d").date()
-                            ex_end = datetime.strptime(ex["end_date"], "%Y-%m-%d").date()
-                            if not (new_end < ex_start or new_start > ex_end):
-                                conflict_in_project = True
-                                break
+                    conflict_in_project = bool(
+                        start_yyyymmdd and temp_end
+                        and find_overlapping_tasks(wp_id, start_yyyymmdd, temp_end, project_id=project_id)
+                    )
                     if conflict_in_project:
                         st.error(
                             "Kolize uvnitř stejného projektu na tomto pracovišti!\n"
@@ -274,8 +247,6 @@ with col2:
                                     st.session_state.pop(key, None)
                                 # Vyčištění parent key
                                 st.session_state.pop("add_task_parent", None)
-                                # Clear cache pokud existuje
-                                st.cache_data.clear()
                                 st.rerun()
                 except Exception as e:
                     st.error(f"Chyba při přidávání úkolu:\n{str(e)}")
@@ -318,8 +289,6 @@ if st.session_state.get("show_collision_confirm", False):
                     st.session_state.pop(key, None)
                 # Vyčištění parent key
                 st.session_state.pop("add_task_parent", None)
-                # Clear cache pokud existuje
-                st.cache_data.clear()
             for k in ["pending_task_data", "colliding_projects", "show_collision_confirm"]:
                 st.session_state.pop(k, None)
             st.rerun()
@@ -1,21 +1,56 @@
+import math
 import streamlit as st
+import pandas as pd
+from st_aggrid import AgGrid, DataReturnMode
 from utils.common import *  # ← importuje VŠECHNO z common.py (nejjednodušší)
-from utils.auth_simple import check_login, logout
-st.set_page_config(page_title="Plánovač HK", layout="wide")
-# Kontrola přihlášení (nový způsob)
-if not check_login():
-    st.switch_page("Home.py")
-    st.stop()
-# Uživatelská data – teď už máš vše v session_state
-username = st.session_state.get("username", "neznámý")
-name = st.session_state.get("name", "Uživatel")
-role = st.session_state.get("role", "viewer")
-read_only = (role == "viewer")
-# Render sidebaru – už bez authenticatoru!
-render_sidebar("Prohlížet / Upravovat úkoly")
+from utils.grid_edits import diff_grid
+from utils.auth_simple import bootstrap_page
+username, name, role, read_only = bootstrap_page("Prohlížet / Upravovat úkoly")
 st.header("Prohlížet / Upravovat úkoly")
 if read_only:
     st.warning("V režimu prohlížení nelze provádět úpravy.")
+def task_grid_row(t, parent_task, coll_text):
+    """
+    Řádek gridu úkolů (sdílí plný i stránkovaný režim).
+    """
+    wp_name = get_workplace_name(t['workplace_id'])
+    start_disp = yyyymmdd_to_ddmmyyyy(t['start_date'])
+    end_disp = yyyymmdd_to_ddmmyyyy(t['end_date'])
+    status_icon = ""
+    if t['status'] == 'done':
+        status_display = "Hotovo"
+        status_icon = "✅ "
+    elif t['status'] == 'canceled':
+        status_display = "Zrušeno"
+        status_icon = "❌ "
+    else:
+        status_display = "Pending"
+    parent_desc = "— (root)"
+    if parent_task:
+        parent_wp = get_workplace_name(parent_task['workplace_id'])
+        parent_start = yyyymmdd_to_ddmmyyyy(parent_task['start_date']) or 'bez data'
+        parent_notes = (parent_task['notes'] or '')[:30] or 'bez poznámky'
+        parent_desc = f"P{t['project_id']} – {parent_wp} – {parent_start} – {parent_notes}..."
+    notes = t.get('notes') or ""
+    task_desc = (
+        f"P{t['project_id']} – {wp_name} – {start_disp} – {t['hours']}h – "
+        f"{status_icon}{status_display} – {notes[:40] or 'bez poznámky'}..."
+    )
+    return {
+        "ID": t['id'],
+        "Parent úkol": parent_desc,
+        "Popis": task_desc,
+        "Pracoviště": wp_name,
+        "Hodiny": t['hours'],
+        "Režim": t['capacity_mode'],
+        "Začátek": start_disp,
+        "Konec": end_disp,
+        "Stav": status_display,
+        "Poznámka": notes,
+        "Kolize": coll_text,
+        "Počet těles": t['bodies_count'],
+        "Aktivní": "Ano" if t['is_active'] else "Ne"
+    }
 projects = get_projects()
 if not projects:
     st.info("Nejprve přidejte alespoň jeden projekt.")
@@ -32,61 +67,93 @@ else:
         key="edit_proj"
     )
     if st.button("Rekalkulovat projekt"):
-        recalculate_project(selected_project)
-        st.success("Projekt přepočítán.")
-        st.rerun()
-    tasks = get_tasks(selected_project)
+        result = recalculate_project(selected_project)
+        if result:
+            written, skipped = result
+            st.toast(f"Projekt přepočítán – změněno {written} úkolů, beze změny přeskočeno {skipped}.")
+            st.rerun()
+    view_mode = st.radio(
+        "Zobrazení",
+        ["Celý projekt (úpravy)", "Po stránkách (prohlížení velkých projektů)"],
+        horizontal=True,
+        key="task_view_mode"
+    )
+    if view_mode.startswith("Po stránkách"):
+        # Stránka, řazení i filtry se řeší v DB; parent a kolize jen pro zobrazené řádky
+        workplaces = get_workplaces()
+        status_filters = {"Vše": None, "Nedokončené": 'open', "Hotovo": 'done', "Zrušeno": 'canceled'}
+        f1, f2, f3, f4 = st.columns(4)
+        with f1:
+            sort_label = st.selectbox("Řadit podle", list(TASK_SORT_COLUMNS), index=1, key="page_sort")
+            descending = st.checkbox("Sestupně", key="page_desc")
+        with f2:
+            wp_filter = st.selectbox("Pracoviště", [None] + [wp_id for wp_id, _ in workplaces],
+                                     format_func=lambda wp_id: "Vše" if wp_id is None else get_workplace_name(wp_id),
+                                     key="page_wp")
+        with f3:
+            status_label = st.selectbox("Stav", list(status_filters), key="page_status")
+            search = st.text_input("Hledat v poznámce", key="page_search").strip()
+        with f4:
+            page_size = st.selectbox("Řádků na stránku", [25, 50, 100], index=1, key="page_size")
+            page = st.number_input("Stránka", min_value=1, step=1, key="page_number")
+        page_rows, total = fetch_task_page(
+            selected_project, page=page, page_size=page_size,
+            sort_by=TASK_SORT_COLUMNS[sort_label], descending=descending,
+            workplace_id=wp_filter, status=status_filters[status_label], search=search or None
+        )
+        page_count = max(1, math.ceil(total / page_size))
+        st.caption(f"Stránka {page} z {page_count} – celkem {total} úkolů")
+        if not page_rows:
+            st.info("Na této stránce nejsou žádné úkoly." if total else "Žádné úkoly neodpovídají filtru.")
+        else:
+            parents, page_collisions = task_page_context(page_rows)
+            page_df = pd.DataFrame([
+                task_grid_row(
+                    t, parents.get(t['id']),
+                    f"⚠️ Kolize: {', '.join(map(str, page_collisions[t['id']]))}" if t['id'] in page_collisions else ""
+                )
+                for t in page_rows
+            ])
+            AgGrid(
+                page_df,
+                height=500,
+                editable=False,
+                gridOptions={
+                    "columnDefs": [{"field": col} for col in page_df.columns],
+                    # Řazení a filtry řeší DB – v gridu by platily jen pro jednu stránku
+                    "defaultColDef": {"resizable": True, "sortable": False, "filter": False},
+                    "rowClassRules": {
+                        "conflict-row": "params.data && params.data['Kolize'] && params.data['Kolize'].trim() !== ''"
+                    }
+                },
+                fit_columns_on_grid_load=True,
+                theme="streamlit",
+                custom_css={".conflict-row": {"background-color": "#ffcccc !important"}},
+                key="task_page_grid"
+            )
+        st.stop()
+    tasks = get_project_tasks(selected_project)
     if not tasks:
         st.info(f"V projektu {selected_display} zatím nejsou žádné úkoly.")
     else:
-        collisions = mark_all_collisions()
+        # Kolize stačí počítat v časovém rozsahu úkolů projektu
+        scheduled = [t for t in tasks if t['start_date'] and t['end_date']]
+        coll_snapshot = load_collision_snapshot(
+            min((t['start_date'] for t in scheduled), default=None),
+            max((t['end_date'] for t in scheduled), default=None)
+        )
+        collisions = mark_all_collisions(coll_snapshot)
+        snap = get_snapshot()  # rodiče úkolů bez dotazu na řádek
+        tasks_by_id = {t['id']: t for t in tasks}
         data = []
         for t in tasks:
-            wp_name = get_workplace_name(t['workplace_id'])
-            start_disp = yyyymmdd_to_ddmmyyyy(t['start_date'])
-            end_disp = yyyymmdd_to_ddmmyyyy(t['end_date'])
             coll_text = ""
             if collisions.get(t['id'], False):
-                colliding = get_colliding_projects(t['id'])
+                colliding = get_colliding_projects(t['id'], coll_snapshot)
                 coll_text = f"⚠️ Kolize: {', '.join(colliding)}"
-            status_display = t['status']
-            status_icon = ""
-            if t['status'] == 'done':
-                status_display = "Hotovo"
-                status_icon = "✅ "
-            elif t['status'] == 'canceled':
-                status_display = "Zrušeno"
-                status_icon = "❌ "
-            else:
-                status_display = "Pending"
-            parent_id = get_parent(t['id'])
-            parent_desc = "— (root)"
-            if parent_id:
-                parent_task = get_task(parent_id)
-                if parent_task:
-                    parent_wp = get_workplace_name(parent_task['workplace_id'])
-                    parent_start = yyyymmdd_to_ddmmyyyy(parent_task['start_date']) or 'bez data'
-                    parent_notes = parent_task['notes'][:30] or 'bez poznámky'
-                    parent_desc = f"P{selected_project} – {parent_wp} – {parent_start} – {parent_notes}..."
-            task_desc = (
-                f"P{selected_project} – {wp_name} – {start_disp} – {t['hours']}h – "
-                f"{status_icon}{status_display} – {t['notes'][:40] or 'bez poznámky'}..."
-            )
-            data.append({
-                "ID": t['id'],
-                "Parent úkol": parent_desc,
-                "Popis": task_desc,
-                "Pracoviště": wp_name,
-                "Hodiny": t['hours'],
-                "Režim": t['capacity_mode'],
-                "Začátek": start_disp,
-                "Konec": end_disp,
-                "Stav": status_display,
-                "Poznámka": t.get('notes', "") or "",
-                "Kolize": coll_text,
-                "Počet těles": t['bodies_count'],
-                "Aktivní": "Ano" if t['is_active'] else "Ne"
-            })
+            parent_id = snap['parent_of'].get(t['id'])
+            parent_task = (tasks_by_id.get(parent_id) or snap['tasks'].get(parent_id)) if parent_id else None
+            data.append(task_grid_row(t, parent_task, coll_text))
         df = pd.DataFrame(data)
         custom_css = {
             ".conflict-row": {
@@ -122,89 +189,55 @@ else:
             fit_columns_on_grid_load=True,
             theme="streamlit",
             custom_css=custom_css,
-            allow_unsafe_jscode=False
+            allow_unsafe_jscode=False,
+            key=f"task_grid_{selected_project}_{st.session_state.get('task_grid_rev', 0)}"
         )
-        updated_df = grid_response['data']
-        changes_made = False
-        for idx, row in updated_df.iterrows():  # Změna na iterrows() pro idx
-            task_id = row['ID']
-            task = get_task(task_id)
-            # Úprava data zahájení
-            new_start_raw = row['Začátek']
-            new_start_str = str(new_start_raw).strip() if pd.notna(new_start_raw) else ""
-            original_start = yyyymmdd_to_ddmmyyyy(task['start_date']) if task['start_date'] else ""
-            # Úprava poznámky
-            new_notes = row['Poznámka'].strip()
-            original_notes = task.get('notes', "") or ""
-            if new_notes != original_notes:
-                try:
-                    update_task(task_id, 'notes', new_notes)
-                    log_action(username, 'update_notes', task_id, f"Změna poznámky z '{original_notes}' na '{new_notes}'")
-                    changes_made = True
-                except Exception as e:
-                    st.error(f"Chyba při úpravě poznámky u úkolu {task_id}: {e}")
-            if new_start_str == original_start:
-                continue
-            # Pokud je to kid a parent není done/canceled, nedovolit změnu
-            parent_id = get_parent(task_id)
-            if parent_id:
-                parent_task = get_task(parent_id)
-                if parent_task['status'] not in ['done', 'canceled']:
-                    st.error(f"Nelze změnit datum u dětského úkolu {task_id}, protože parent není hotový nebo zrušený.")
-                    continue
-                else:
-                    # Nastav flag custom_start při manuální změně u child
-                    update_task(task_id, 'custom_start', True)
-            if not new_start_str:
+        # Dávka neuložených změn = rozdíl gridu proti načteným úkolům (bez dotazů do DB)
+        pending = diff_grid(df, grid_response['data'], ["Začátek", "Poznámka"])
+        st.session_state["pending_task_edits"] = pending
+        for msg_type, msg in st.session_state.pop("task_edit_messages", []):
+            getattr(st, msg_type)(msg)
+        if pending:
+            original = df.set_index("ID")
+            st.info(f"Neuložené změny: {sum(len(f) for f in pending.values())}")
+            st.dataframe(pd.DataFrame([
+                {"ID": task_id, "Pole": col, "Původně": original.at[task_id, col], "Nově": value}
+                for task_id, fields in pending.items() for col, value in fields.items()
+            ]), hide_index=True, use_container_width=True)
+            col_save, col_discard = st.columns(2)
+            with col_save:
+                save_clicked = st.button("Uložit změny", type="primary", use_container_width=True)
+            with col_discard:
+                discard_clicked = st.button("Zahodit změny", use_container_width=True)
+            if discard_clicked:
+                st.session_state["task_grid_rev"] = st.session_state.get("task_grid_rev", 0) + 1
+                st.rerun()
+            if save_clicked:
+                edits, messages = {}, []
+                for task_id, fields in pending.items():
+                    edit = {}
+                    if "Poznámka" in fields:
+                        edit['notes'] = fields["Poznámka"]
+                    if "Začátek" in fields:
+                        new_start_str = fields["Začátek"]
+                        if not new_start_str:
+                            edit['start_date'] = None
+                        elif validate_ddmmyyyy(new_start_str):
+                            edit['start_date'] = ddmmyyyy_to_yyyymmdd(new_start_str)
+                        else:
+                            messages.append(("error", f"Neplatné datum u úkolu {task_id}: '{new_start_str}'. Použijte např. 1.1.2026 nebo 15.03.2025"))
+                    if edit:
+                        edits[task_id] = edit
                 try:
-                    update_task(task_id, 'start_date', None)
-                    log_action(username, 'update_start_date', task_id, "Datum zahájení vymazáno")
-                    recalculate_from_task(task_id)
-                    changes_made = True
+                    saved, errors, warnings = commit_task_edits(selected_project, edits, username)
+                    messages += [("error", e) for e in errors] + [("warning", w) for w in warnings]
+                    if saved:
+                        messages.append(("success", f"Uloženo úkolů: {len(saved)}, termíny přepočítány."))
                 except Exception as e:
-                    st.error(f"Chyba při vymazání data u úkolu {task_id}: {e}")
-                continue
-            if not validate_ddmmyyyy(new_start_str):
-                st.error(f"Neplatné datum u úkolu {task_id}: '{new_start_str}'. Použijte např. 1.1.2026 nebo 15.03.2025")
-                continue
-            # Nový check kolize v projektu před updatem
-            try:
-                new_yyyymmdd = ddmmyyyy_to_yyyymmdd(new_start_str)
-                temp_end = calculate_end_date(new_yyyymmdd, task['hours'], task['capacity_mode'])
-                # Intra-projekt kolize (v rámci stejného projektu, stejné WP) - zakázat
-                existing_in_project = supabase.table('tasks').select('id, start_date, end_date').eq('project_id', task['project_id']).eq('workplace_id', task['workplace_id']).neq('id', task_id).not_.is_('start_date', 'null').not_.is_('end_date', 'null').execute().data
-                new_start_date = datetime.strptime(new_yyyymmdd, '%Y-%m-%d').date()
-                new_end_date = datetime.strptime(temp_end, '%Y-%m-%d').date()
-                conflict_in_project = False
-                for ex in existing_in_project:
-                    ex_start = datetime.strptime(ex['start_date'], '%Y-%m-%d').date()
-                    ex_end = datetime.strptime(ex['end_date'], '%Y-%m-%d').date()
-                    if not (new_end_date < ex_start or new_start_date > ex_end):
-                        conflict_in_project = True
-                        break
-                if conflict_in_project:
-                    st.error(f"Kolize v rámci projektu u úkolu {task_id} na tomto pracovišti. Upravte datum a zkuste znovu.")
-                    continue
-                # Inter-projekt kolize (jiné projekty, stejné WP) - upozornit, ale povolit
-                existing_out_project = supabase.table('tasks').select('id, start_date, end_date, project_id').neq('project_id', task['project_id']).eq('workplace_id', task['workplace_id']).not_.is_('start_date', 'null').not_.is_('end_date', 'null').execute().data
-                conflict_out_project = []
-                for ex in existing_out_project:
-                    ex_start = datetime.strptime(ex['start_date'], '%Y-%m-%d').date()
-                    ex_end = datetime.strptime(ex['end_date'], '%Y-%m-%d').date()
-                    if not (new_end_date < ex_start or new_start_date > ex_end):
-                        conflict_out_project.append(f"P{ex['project_id']}")
-                if conflict_out_project:
-                    st.warning(f"Pozor, po změně dojde ke kolizi s jinými projekty na stejném pracovišti: {', '.join(set(conflict_out_project))}. Změna bude provedena, ale zkontrolujte kolize.")
-                # Proveď update
-                update_task(task_id, 'start_date', new_yyyymmdd)
-                log_action(username, 'update_start_date', task_id, f"Změna data zahájení z '{original_start}' na '{new_start_str}'")
-                recalculate_from_task(task_id)
-                changes_made = True
-            except Exception as e:
-                st.error(f"Chyba při úpravě data u úkolu {task_id}: {e}")
-        if changes_made:
-            st.success("Změny uloženy a termíny přepočítány.")
-            st.rerun()
+                    messages.append(("error", f"Chyba při ukládání změn: {e}"))
+                st.session_state["task_edit_messages"] = messages
+                st.session_state["task_grid_rev"] = st.session_state.get("task_grid_rev", 0) + 1
+                st.rerun()
         if tasks and not read_only:
             st.markdown("### Změna stavu úkolu")
             task_options = []
@@ -1,119 +1,53 @@
 # pages/5_HMG_roční.py
 import streamlit as st
-from datetime import datetime, timedelta, date
+from datetime import datetime, date
 import pandas as pd
 import plotly.express as px
 from utils.common import *  # ← všechno ostatní (get_workplaces, is_working_day atd.)
-from utils.auth_simple import check_login, logout
-st.set_page_config(page_title="Plánovač HK", layout="wide")
-# Kontrola přihlášení (nový způsob)
-if not check_login():
-    st.switch_page("Home.py")
-    st.stop()
-
-# Uživatelská data – teď už máš vše v session_state
-username = st.session_state.get("username", "neznámý")
-name = st.session_state.get("name", "Uživatel")
-role = st.session_state.get("role", "viewer")
-read_only = (role == "viewer")
-
-render_sidebar("HMG roční")
+from utils.occupancy import monthly_hours, MONTH_NAMES
+from utils.capacity import utilization_pct
+from utils.auth_simple import bootstrap_page
+username, name, role, read_only = bootstrap_page("HMG roční")
 
 st.header("HMG roční – Heatmap obsazenosti pracovišť")
 
 year = st.number_input("Rok", min_value=2020, max_value=2030, value=datetime.now().year, key="year_rocni")
 
-MONTH_CAPACITY = 200.0
-
 workplaces = get_workplaces()
 if not workplaces:
     st.info("Žádná pracoviště v databázi.")
     st.stop()
 
-months = ['Led', 'Úno', 'Bře', 'Dub', 'Kvě', 'Čer', 'Čvc', 'Srp', 'Zář', 'Říj', 'Lis', 'Pro']
-month_order = {m: i for i, m in enumerate(months)}
-
-occupancy = {wp_name: [0.0 for _ in range(12)] for _, wp_name in workplaces}
+months = MONTH_NAMES
 
+# Matice hodin [pracoviště × den] – cache podle (rok, verze dat), přepnutí roku je okamžité
 try:
-    response = supabase.table('tasks')\
-               .select('id, workplace_id, hours, capacity_mode, start_date, end_date, status')\
-               .not_.is_('start_date', 'null')\
-               .not_.is_('end_date', 'null')\
-               .execute()
-    tasks = response.data
+    wp_ids, day_matrix = get_year_occupancy(year)
+    capacity_matrix = get_capacity_matrix(wp_ids, date(year, 1, 1), date(year, 12, 31))
 except Exception as e:
     st.error(f"Chyba při načítání úkolů z databáze: {e}")
-    tasks = []
-
-for t in tasks:
-    if t['status'] == 'canceled':
-        continue
-
-    wp_id = t['workplace_id']
-    total_hours = t['hours']
-    mode = t['capacity_mode']
-    start_str = t['start_date']
-    end_str = t['end_date']
-
-    wp_name = get_workplace_name(wp_id)
-    if wp_name not in occupancy:
-        continue
-
-    try:
-        start_date = datetime.strptime(start_str, '%Y-%m-%d').date()
-        end_date = datetime.strptime(end_str, '%Y-%m-%d').date()
-    except ValueError:
-        st.warning(f"Neplatné datum u úkolu ID {t['id']} – přeskočeno.")
-        continue
-
-    if end_date.year < year or start_date.year > year:
-        continue
-
-    current = max(start_date, date(year, 1, 1))
-    end_in_year = min(end_date, date(year, 12, 31))
-
-    working_days = 0
-    while current <= end_in_year:
-        if is_working_day(current, mode):
-            working_days += 1
-        current += timedelta(days=1)
-
-    if working_days == 0:
-        continue
-
-    hours_per_day = total_hours / working_days
-
-    current = max(start_date, date(year, 1, 1))
-    while current <= end_in_year:
-        if is_working_day(current, mode):
-            month_idx = current.month - 1
-            occupancy[wp_name][month_idx] += hours_per_day
-        current += timedelta(days=1)
-
-data = []
-for wp_name, occ in occupancy.items():
-    for m_idx, occ_hours in enumerate(occ):
-        percent = round((occ_hours / MONTH_CAPACITY) * 100, 1)
-        data.append({
-            "Pracoviště": wp_name,
-            "Měsíc": months[m_idx],
-            "Hodiny": round(occ_hours, 1),
-            "% využití": percent
-        })
+    st.stop()
 
-if not data:
+# Heatmapa i tabulka jsou jen redukce matic zatížení a kapacity po měsících
+wp_labels = [get_workplace_name(wp_id) for wp_id in wp_ids]
+hours_pivot = pd.DataFrame(monthly_hours(day_matrix, year), index=wp_labels, columns=months)
+hours_pivot = hours_pivot.groupby(level=0).sum().sort_index()
+capacity_pivot = pd.DataFrame(monthly_hours(capacity_matrix, year), index=wp_labels, columns=months)
+capacity_pivot = capacity_pivot.groupby(level=0).sum().loc[hours_pivot.index]
+hours_pivot.index.name = "Pracoviště"
+hours_pivot.columns.name = "Měsíc"
+# % využití = zatížení / kapacita pracoviště v daném měsíci (směny, svátky, odstávky, údržba)
+percent_pivot = pd.DataFrame(
+    utilization_pct(hours_pivot.values, capacity_pivot.values),
+    index=hours_pivot.index, columns=hours_pivot.columns
+).round(1)
+hours_pivot = hours_pivot.round(1)
+
+if hours_pivot.empty:
     st.info(f"Žádné úkoly pro rok {year}.")
 else:
-    df = pd.DataFrame(data)
-    df['Měsíc_order'] = df['Měsíc'].map(month_order)
-    df = df.sort_values(['Pracoviště', 'Měsíc_order'])
-
-    pivot_df = df.pivot(index="Pracoviště", columns="Měsíc", values="% využití")
-    pivot_df = pivot_df[months]  # zajistí správné pořadí měsíců
-
     fig = px.imshow(
-        pivot_df,
+        percent_pivot,
         labels=dict(color="% využití"),
         title=f"Obsazenost pracovišť {year}",
         color_continuous_scale=["#90EE90", "#FFFF99", "#FFB366", "#FF6B6B"],
@@ -134,22 +68,14 @@ else:
 
     st.subheader("Detailní přehled (hodiny / %)")
 
-    hours_pivot = df.pivot(index="Pracoviště", columns="Měsíc", values="Hodiny")
-    hours_pivot = hours_pivot[months]
-
-    percent_pivot = df.pivot(index="Pracoviště", columns="Měsíc", values="% využití")
-    percent_pivot = percent_pivot[months]
-
     combined = pd.concat([hours_pivot, percent_pivot], axis=1, keys=["Hodiny", "% využití"])
 
     # Správné sloupce v pořadí
     combined_columns = []
     for month in months:
-        if ("Hodiny", month) in combined.columns:
-            combined_columns.append(("Hodiny", month))
-        if ("% využití", month) in combined.columns:
-            combined_columns.append(("% využití", month))
+        combined_columns.append(("Hodiny", month))
+        combined_columns.append(("% využití", month))
 
     combined = combined[combined_columns]
 
-    st.dataframe(combined, width='stretch')
\ No newline at end of file
+    st.dataframe(combined, width='stretch')
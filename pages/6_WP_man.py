@@ -2,20 +2,8 @@
 import streamlit as st
 from utils.common import *  # ← všechno (add_workplace, delete_workplace, get_workplaces atd.)
 
-from utils.auth_simple import check_login, logout
-st.set_page_config(page_title="Plánovač HK", layout="wide")
-# Kontrola přihlášení (nový způsob)
-if not check_login():
-    st.switch_page("Home.py")
-    st.stop()
-
-# Uživatelská data – teď už máš vše v session_state
-username = st.session_state.get("username", "neznámý")
-name = st.session_state.get("name", "Uživatel")
-role = st.session_state.get("role", "viewer")
-read_only = (role == "viewer")
-
-render_sidebar("Správa pracovišť")
+from utils.auth_simple import bootstrap_page
+username, name, role, read_only = bootstrap_page("Správa pracovišť")
 
 # Hlavní obsah – jen pro adminy
 if role != 'admin':
@@ -71,4 +59,69 @@ else:
                     else:
                         st.session_state[f"confirm_delete_{wp_id}"] = True
                         st.warning(f"Opravdu chcete smazat pracoviště **{wp_name}**? Klikněte znovu na Smazat pro potvrzení.")
-                        st.rerun()
\ No newline at end of file
+                        st.rerun()
+
+    # ──────────────────────────────────────────────────────────────
+    # KAPACITA PRACOVIŠTĚ (směnový vzor, odstávky, údržba)
+    # ──────────────────────────────────────────────────────────────
+    st.divider()
+    st.subheader("Kapacita pracoviště")
+
+    if workplaces:
+        from utils.capacity import WEEKDAY_LABELS, WINDOW_KINDS, default_profile
+
+        cap_wp_id, cap_wp_name = st.selectbox("Pracoviště", workplaces, format_func=lambda wp: wp[1], key="cap_wp")
+        profile = get_capacity_profiles().get(cap_wp_id) or default_profile()
+
+        with st.form(f"cap_pattern_{cap_wp_id}"):
+            st.caption("Směnový vzor – hodiny provozu v jednotlivých dnech týdne")
+            day_cols = st.columns(7)
+            weekday_hours = [
+                col.number_input(label, min_value=0.0, max_value=24.0, value=float(hours), step=0.5,
+                                 key=f"cap_hours_{cap_wp_id}_{i}")
+                for i, (col, label, hours) in enumerate(zip(day_cols, WEEKDAY_LABELS, profile['weekly_hours']))
+            ]
+            holidays_off = st.checkbox("O státních svátcích mimo provoz", value=profile['holidays_off'])
+            if st.form_submit_button("Uložit směnový vzor"):
+                try:
+                    save_capacity_pattern(cap_wp_id, weekday_hours, holidays_off)
+                    st.success(f"Směnový vzor pracoviště **{cap_wp_name}** uložen.")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Chyba při ukládání kapacity: {e}")
+
+        st.caption("Plánované odstávky a údržba")
+        if not profile['windows']:
+            st.info("Žádné odstávky ani údržba.")
+        for window_id, kind, date_from, date_to, lost_hours in profile['windows']:
+            c1, c2 = st.columns([4, 1])
+            label = f"{WINDOW_KINDS[kind]}: {date_from:%d.%m.%Y} – {date_to:%d.%m.%Y}"
+            if kind == 'maintenance':
+                label += f" (−{lost_hours:g} h/den)"
+            c1.write(label)
+            if c2.button("Smazat", key=f"del_cap_{window_id}"):
+                try:
+                    delete_capacity_window(window_id)
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Chyba při mazání: {e}")
+
+        with st.form(f"cap_window_{cap_wp_id}", clear_on_submit=True):
+            window_kind = st.radio("Typ", list(WINDOW_KINDS), format_func=WINDOW_KINDS.get, horizontal=True)
+            c1, c2, c3 = st.columns(3)
+            window_from = c1.date_input("Od", format="DD.MM.YYYY")
+            window_to = c2.date_input("Do", format="DD.MM.YYYY")
+            window_hours = c3.number_input("Úbytek hodin za den (jen údržba)", min_value=0.0, max_value=24.0,
+                                           value=8.0, step=0.5)
+            window_note = st.text_input("Poznámka")
+            if st.form_submit_button("Přidat"):
+                if window_to < window_from:
+                    st.error("Konec je před začátkem.")
+                else:
+                    try:
+                        add_capacity_window(cap_wp_id, window_kind, window_from, window_to,
+                                            window_hours if window_kind == 'maintenance' else 0, window_note)
+                        st.success(f"{WINDOW_KINDS[window_kind]} přidána.")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Chyba při ukládání: {e}")
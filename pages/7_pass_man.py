@@ -1,20 +1,8 @@
 # pages/7_Změnit_heslo.py
 import streamlit as st
 from utils.common import *  # ← všechno (change_password atd.)
-from utils.auth_simple import check_login, logout
-st.set_page_config(page_title="Plánovač HK", layout="wide")
-# Kontrola přihlášení (nový způsob)
-if not check_login():
-    st.switch_page("Home.py")
-    st.stop()
-
-# Uživatelská data – teď už máš vše v session_state
-username = st.session_state.get("username", "neznámý")
-name = st.session_state.get("name", "Uživatel")
-role = st.session_state.get("role", "viewer")
-read_only = (role == "viewer")
-
-render_sidebar("Změnit heslo")
+from utils.auth_simple import bootstrap_page
+username, name, role, read_only = bootstrap_page("Změnit heslo")
 
 st.header("Změnit heslo")
 
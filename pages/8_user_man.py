@@ -2,21 +2,8 @@
 import time
 import streamlit as st
 from utils.common import *  # ← add_user, reset_password, delete_project, get_project_choices, get_projects atd.
-from utils.auth_simple import check_login, logout
-st.set_page_config(page_title="Plánovač HK", layout="wide")
-# Kontrola přihlášení
-if not check_login():
-    st.switch_page("Home.py")
-    st.stop()
-
-# Uživatelská data
-username = st.session_state.get("username", "neznámý")
-name = st.session_state.get("name", "Uživatel")
-role = st.session_state.get("role", "viewer")
-read_only = (role == "viewer")
-
-# Sidebar
-render_sidebar("User Management")
+from utils.auth_simple import bootstrap_page
+username, name, role, read_only = bootstrap_page("User Management")
 
 # Celý obsah jen pro adminy
 if role != 'admin':
@@ -26,10 +13,10 @@ else:
 
     # Načteme uživatele jednou (pro všechny sekce)
     try:
-        users_response = supabase.table('app_users')\
-                         .select("username, name, role, email")\
-                         .execute()
-        users = users_response.data or []
+        users = fetch_all(
+            lambda: supabase.table('app_users').select("username, name, role, email"),
+            key='username'
+        )
     except Exception as e:
         st.error(f"Chyba při načítání uživatelů: {e}")
         users = []
@@ -93,6 +80,7 @@ else:
     # 3. Aktuální uživatelé + Smazání uživatele
     st.subheader("Aktuální uživatelé")
     if users:
+        import pandas as pd
         df_users = pd.DataFrame(users)
         df_users = df_users.rename(columns={
             "username": "Uživatelské jméno",
@@ -104,6 +92,26 @@ else:
     else:
         st.info("V databázi zatím nejsou žádní uživatelé.")
 
+    # Změna role (projeví se i v již přihlášených sessions přes invalidaci cache uživatelů)
+    st.markdown("### Změna role uživatele")
+    if users:
+        role_user_str = st.selectbox("Vyberte uživatele", user_options, key="role_user_select")
+        role_username = role_user_str.split(" (")[0]
+        current_role = next((u['role'] for u in users if u['username'] == role_username), 'viewer')
+        role_choices = ["admin", "normal", "viewer"]
+        new_user_role = st.selectbox(
+            "Nová role", role_choices,
+            index=role_choices.index(current_role) if current_role in role_choices else 2,
+            key="role_new_select"
+        )
+        if st.button("Změnit roli", disabled=new_user_role == current_role):
+            success, message = set_user_role(role_username, new_user_role)
+            if success:
+                st.success(message)
+                st.rerun()
+            else:
+                st.error(message)
+
     # Smazání uživatele (pod seznamem)
     st.markdown("### Smazání uživatele (neodvolatelné!)")
     if users:
@@ -115,18 +123,13 @@ else:
             agree_delete = st.checkbox(f"Potvrzuji trvalé smazání uživatele **{selected_username}** (nelze vrátit)")
             
             if st.button("SMAZAT UŽIVATELE", type="primary", disabled=not agree_delete):
-                try:
-                    response = supabase.table('app_users')\
-                               .delete()\
-                               .eq("username", selected_username)\
-                               .execute()
-                    if response.data:
-                        st.success(f"Uživatel '{selected_username}' byl úspěšně smazán.")
-                        st.rerun()
-                    else:
-                        st.error("Uživatel nenalezen nebo smazání selhalo.")
-                except Exception as e:
-                    st.error(f"Chyba při mazání uživatele: {e}")
+                # delete_user zneplatní cache uživatelů – session smazaného uživatele skončí
+                success, message = delete_user(selected_username)
+                if success:
+                    st.success(message)
+                    st.rerun()
+                else:
+                    st.error(message)
     else:
         st.info("Žádní uživatelé k smazání.")
 
@@ -157,4 +160,15 @@ else:
             except Exception as e:
                 st.error(f"Chyba při mazání projektu: {e}")
     else:
-        st.info("Žádné projekty k smazání.")
\ No newline at end of file
+        st.info("Žádné projekty k smazání.")
+
+    # 5. Provozní stav zápisů (auditní fronta, přeskočené zápisy úkolů)
+    st.markdown("### Provozní stav zápisů")
+    audit = get_audit_stats()
+    writes = get_write_stats()
+    cols = st.columns(5)
+    cols[0].metric("Audit ve frontě", audit['queued'])
+    cols[1].metric("Audit zapsáno", audit['written'])
+    cols[2].metric("Audit zahozeno", audit['dropped'] + audit['failed'])
+    cols[3].metric("Úkoly zapsány", writes['written'])
+    cols[4].metric("Úkoly beze změny", writes['skipped'])
@@ -0,0 +1,57 @@
+# pages/9_gantt.py
+import streamlit as st
+from datetime import datetime, timedelta
+from utils.common import *
+from utils.auth_simple import bootstrap_page
+username, name, role, read_only = bootstrap_page("Gantt – dlouhý horizont")
+st.header("Gantt – dlouhý horizont (kvartál, rok, řetězec projektu)")
+# ──────────────────────────────────────────────────────────────
+# FILTRY
+# ──────────────────────────────────────────────────────────────
+projects = get_projects()
+workplaces = get_workplaces()
+project_names = {pid: f"{pid} – {pname}" if pname else str(pid) for pid, pname, _ in projects}
+wp_names = dict(workplaces)
+col_proj, col_wp = st.columns(2)
+with col_proj:
+    selected_projects = st.multiselect(
+        "Projekty (prázdné = všechny)", options=list(project_names),
+        format_func=lambda pid: project_names[pid], key="gantt_projects"
+    )
+with col_wp:
+    selected_wps = st.multiselect(
+        "Pracoviště (prázdné = všechna)", options=list(wp_names),
+        format_func=lambda wp_id: wp_names[wp_id], key="gantt_wps"
+    )
+today = datetime.now().date()
+default_from, default_to = today - timedelta(days=30), today + timedelta(days=335)
+span = project_date_span(set(selected_projects)) if selected_projects else None
+use_project_span = False
+if span:
+    use_project_span = st.checkbox("Celý řetězec vybraných projektů", value=True, key="gantt_project_span")
+col_from, col_to, col_lod = st.columns(3)
+with col_from:
+    date_from = st.date_input("Od", value=default_from, format="DD.MM.YYYY", key="gantt_from",
+                              disabled=use_project_span)
+with col_to:
+    date_to = st.date_input("Do", value=default_to, format="DD.MM.YYYY", key="gantt_to",
+                            disabled=use_project_span)
+with col_lod:
+    lod_choice = st.radio("Zobrazení", ["Automaticky", "Jednotlivé úkoly", "Souhrn po pracovištích"],
+                          horizontal=True, key="gantt_lod")
+if use_project_span:
+    date_from, date_to = span
+if date_to < date_from:
+    st.error("Konec rozsahu je před začátkem.")
+    st.stop()
+detail = {"Automaticky": None, "Jednotlivé úkoly": True, "Souhrn po pracovištích": False}[lod_choice]
+# ──────────────────────────────────────────────────────────────
+# GRAF (WebGL, dráhy počítané na serveru, cache podle verze dat)
+# ──────────────────────────────────────────────────────────────
+fig = get_gantt_figure(date_from, date_to, project_ids=selected_projects,
+                       workplace_ids=selected_wps, detail=detail)
+if fig is None:
+    st.info("V zadaném rozsahu nejsou žádné naplánované úkoly.")
+else:
+    st.caption(f"{date_from:%d.%m.%Y} – {date_to:%d.%m.%Y}. Posun tažením, zoom kolečkem myši.")
+    st.plotly_chart(fig, use_container_width=True, config={'scrollZoom': True})
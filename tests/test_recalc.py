@@ -0,0 +1,81 @@
+import copy
+from datetime import date
+
+from utils.recalc import plan_recalculation
+from utils.workcal import get_calendar
+
+
+def _end_date(start, hours, mode):
+    return get_calendar(mode).end_date(date.fromisoformat(start), hours, mode).isoformat()
+
+
+def _next_day(end, mode):
+    return get_calendar(mode).next_working_day_after(date.fromisoformat(end)).isoformat()
+
+
+# Referenční kopie původního rekurzivního recalculate_from_task nad slovníkem místo DB
+def _old_recalculate(tasks, children_of, task_id):
+    task = tasks.get(task_id)
+    if not task:
+        return
+    if task['status'] == 'canceled' or not task['start_date']:
+        task['end_date'] = None
+        child_start = None
+    else:
+        task['end_date'] = _end_date(task['start_date'], task['hours'], task['capacity_mode'])
+        child_start = _next_day(task['end_date'], task['capacity_mode'])
+    for child_id in children_of.get(task_id, []):
+        child = tasks.get(child_id)
+        if not child or child['status'] == 'canceled':
+            continue
+        if not (task['status'] in ('done', 'canceled') and child.get('custom_start', False)):
+            child['start_date'] = child_start
+        _old_recalculate(tasks, children_of, child_id)
+
+
+def _task(tid, start=None, hours=16, mode='7.5', status='open', custom_start=False, end=None):
+    return {'id': tid, 'start_date': start, 'end_date': end, 'hours': hours,
+            'capacity_mode': mode, 'status': status, 'custom_start': custom_start}
+
+
+def _assert_same(tasks, children_of, start_ids):
+    expected = copy.deepcopy(tasks)
+    for tid in start_ids:
+        _old_recalculate(expected, children_of, tid)
+    changes = plan_recalculation(tasks, children_of, start_ids, _end_date, _next_day)
+    actual = copy.deepcopy(tasks)
+    for tid, fields in changes.items():
+        actual[tid].update(fields)
+    assert actual == expected
+    # Jen skutečně změněné řádky
+    for tid, fields in changes.items():
+        assert all(tasks[tid][f] != v for f, v in fields.items())
+
+
+def test_chain():
+    tasks = {1: _task(1, '2025-12-22', hours=30), 2: _task(2, hours=8, mode='24'),
+             3: _task(3, hours=100), 4: _task(4, hours=7.5)}
+    children_of = {1: [2], 2: [3], 3: [4]}
+    _assert_same(tasks, children_of, [1])
+
+
+def test_diamond():
+    tasks = {1: _task(1, '2025-04-17', hours=15), 2: _task(2, hours=60),
+             3: _task(3, hours=8, mode='24'), 4: _task(4, hours=20)}
+    children_of = {1: [2, 3], 2: [4], 3: [4]}
+    _assert_same(tasks, children_of, [1])
+
+
+def test_parent_without_dates_clears_subtree():
+    tasks = {1: _task(1, None), 2: _task(2, '2025-03-03', end='2025-03-05'),
+             3: _task(3, '2025-03-06', end='2025-03-10')}
+    children_of = {1: [2], 2: [3]}
+    _assert_same(tasks, children_of, [1])
+
+
+def test_canceled_child_and_custom_start_after_done_parent():
+    tasks = {1: _task(1, '2025-06-02', status='done'),
+             2: _task(2, '2025-07-01', custom_start=True), 3: _task(3, '2025-01-01', status='canceled'),
+             4: _task(4), 5: _task(5, '2025-06-10', custom_start=True)}
+    children_of = {1: [2, 3, 4], 3: [5]}
+    _assert_same(tasks, children_of, [1])
@@ -0,0 +1,21 @@
+from utils.session_token import issue_token, verify_token
+
+KEY = 'test-key'
+
+
+def test_roundtrip():
+    claims = verify_token(issue_token({'username': 'jan', 'role': 'admin'}, KEY), KEY)
+    assert claims['username'] == 'jan' and claims['role'] == 'admin'
+
+
+def test_wrong_key_or_expired():
+    token = issue_token({'username': 'jan'}, KEY)
+    assert verify_token(token, 'jiny-klic') is None
+    assert verify_token(issue_token({'username': 'jan'}, KEY, ttl=-1), KEY) is None
+
+
+def test_tampered_non_ascii_is_rejected():
+    body = issue_token({'username': 'jan'}, KEY).rsplit('.', 1)[0]
+    assert verify_token(body + '.é', KEY) is None
+    assert verify_token('é.' + 'x', KEY) is None
+    assert verify_token('bez-tecky', KEY) is None
@@ -0,0 +1,70 @@
+import math
+import random
+from datetime import date, timedelta
+
+from utils.workcal import get_calendar, get_holidays
+
+
+# Referenční kopie původního výpočtu po dnech (utils/common.py před prefixovými součty)
+def _old_is_holiday(dt):
+    holidays = get_holidays(dt.year)
+    if dt.month == 1:
+        holidays += get_holidays(dt.year - 1)
+    if dt.month == 12:
+        holidays += get_holidays(dt.year + 1)
+    return dt in holidays
+
+
+def _old_is_working_day(dt, mode):
+    if mode == '7.5' and dt.weekday() >= 5:
+        return False
+    return not _old_is_holiday(dt)
+
+
+def _old_end_date(start, hours, mode):
+    capacity = 7.5 if mode == '7.5' else 24.0
+    days_needed = math.ceil(hours / capacity)
+    current = start
+    days_count = 0
+    while days_count < days_needed:
+        if _old_is_working_day(current, mode):
+            days_count += 1
+        current += timedelta(days=1)
+    return current - timedelta(days=1)
+
+
+def _old_next_working_day_after(d, mode):
+    current = d + timedelta(days=1)
+    while not _old_is_working_day(current, mode):
+        current += timedelta(days=1)
+    return current
+
+
+MODES = ('7.5', '24')
+
+
+def test_end_date_matches_old_loop_randomized():
+    rng = random.Random(5)
+    for _ in range(3000):
+        start = date(2023, 1, 1) + timedelta(days=rng.randint(0, 1500))
+        hours = rng.choice([0, 0.5, 7.5, 8, 15, 22.5, 24, 24.5, 100, 333.3, rng.uniform(0, 600)])
+        mode = rng.choice(MODES)
+        assert get_calendar(mode).end_date(start, hours, mode) == _old_end_date(start, hours, mode), (start, hours, mode)
+
+
+def test_end_date_around_weekends_and_holidays():
+    # Pátek před víkendem, Štědrý den + svátky, Velikonoční pondělí 2025 (21. 4.), přelom roku
+    starts = [date(2025, 1, 3), date(2025, 12, 23), date(2025, 12, 24), date(2025, 4, 18),
+              date(2025, 4, 21), date(2025, 12, 31), date(2026, 1, 1), date(2025, 7, 4)]
+    for start in starts:
+        for mode in MODES:
+            for hours in (0.1, 7.5, 7.6, 24, 40, 48.5, 200):
+                assert get_calendar(mode).end_date(start, hours, mode) == _old_end_date(start, hours, mode)
+
+
+def test_next_working_day_matches_old_loop():
+    day = date(2024, 12, 1)
+    for _ in range(800):
+        for mode in MODES:
+            assert get_calendar(mode).next_working_day_after(day) == _old_next_working_day_after(day, mode)
+        day += timedelta(days=1)
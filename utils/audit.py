@@ -0,0 +1,148 @@
+# utils/audit.py
+"""
+Auditní zápisy (change_log, logs) mimo vlákno skriptu: ohraničená fronta v procesu
+a jedno vlákno na pozadí, které je zapisuje dávkovými inserty – po BATCH_SIZE řádcích
+nebo nejpozději po FLUSH_INTERVAL sekundách. Plná fronta řádek zahodí (počítá se),
+UI tedy na audit nikdy nečeká. Při ukončení procesu se fronta dopíše (atexit).
+"""
+import atexit
+import queue
+import threading
+import time
+
+QUEUE_SIZE = 10000
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 2.0  # sekundy
+DRAIN_TIMEOUT = 10.0  # sekundy – jak dlouho čekat na dopsání fronty při ukončení
+
+
+class AuditWriter:
+    """
+    insert(table, rows) provede jeden insert seznamu řádků do tabulky (volá se z vlákna na pozadí).
+    """
+
+    def __init__(self, insert, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self._insert = insert
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._flush_now = threading.Event()
+        self._idle = threading.Condition()
+        self._pending = 0
+        self._counters = {'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def enqueue(self, table, rows):
+        """
+        Zařadí řádky k zápisu bez čekání. Vrátí počet přijatých (zbytek se zahodí, je-li fronta plná).
+        """
+        if self._stop.is_set():
+            self._count('dropped', len(rows))
+            return 0
+        accepted = 0
+        for row in rows:
+            with self._idle:
+                self._pending += 1
+            try:
+                self._queue.put_nowait((table, row))
+                accepted += 1
+            except queue.Full:
+                self._done(1)
+                self._count('dropped', 1)
+        return accepted
+
+    def flush(self, timeout=DRAIN_TIMEOUT):
+        """
+        Vynutí okamžitý zápis a počká, až je fronta prázdná. Vrátí True, stihlo-li se to do timeout.
+        """
+        self._flush_now.set()
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._thread.is_alive():
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def close(self, timeout=DRAIN_TIMEOUT):
+        """
+        Dopíše frontu a ukončí vlákno; další enqueue už jen zahazuje.
+        """
+        if self._stop.is_set():
+            return
+        self.flush(timeout)
+        self._stop.set()
+        self._flush_now.set()
+        self._thread.join(timeout)
+
+    def stats(self):
+        """
+        {'queued', 'written', 'dropped', 'failed', 'batches'} – hloubka fronty a počítadla řádků od startu.
+        """
+        with self._idle:
+            return {'queued': self._queue.qsize(), **self._counters}
+
+    def _count(self, name, count):
+        with self._idle:
+            self._counters[name] += count
+
+    def _done(self, count):
+        with self._idle:
+            self._pending -= count
+            if not self._pending:
+                self._idle.notify_all()
+
+    def _next_batch(self):
+        """
+        Řádky do dávky: čeká na první, pak sbírá do BATCH_SIZE nebo do uplynutí FLUSH_INTERVAL.
+        """
+        batch = []
+        deadline = time.monotonic() + self._flush_interval
+        while len(batch) < self._batch_size:
+            if self._flush_now.is_set() or self._stop.is_set():
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    self._flush_now.clear()
+                    break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _write(self, table, rows):
+        try:
+            self._insert(table, rows)
+            self._count('written', len(rows))
+            self._count('batches', 1)
+            return
+        except Exception as e:
+            print(f"Chyba při zápisu auditu do {table} (dávka {len(rows)} řádků): {e}")
+        # Dávka neprošla – po řádcích, ať jeden vadný řádek nezahodí ostatní
+        for row in rows:
+            try:
+                self._insert(table, [row])
+                self._count('written', 1)
+            except Exception:
+                self._count('failed', 1)
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            by_table = {}
+            for table, row in batch:
+                by_table.setdefault(table, []).append(row)
+            for table, rows in by_table.items():
+                self._write(table, rows)
+            self._done(len(batch))
@@ -1,16 +1,41 @@
 # utils/auth_simple.py
 import streamlit as st
 from streamlit_cookies_controller import CookieController
-from streamlit_authenticator.utilities.hasher import Hasher
 import time
-from utils.common import supabase
+from utils.common import supabase, COOKIE_KEY, USER_CACHE_TTL, get_user_record, get_users_version, render_sidebar
+from utils.session_token import issue_token, verify_token, TOKEN_TTL
 import bcrypt  # ← PŘIDEJ tento import nahoře v souboru!
 
 def get_cookie_controller():
     if "cookie_controller" not in st.session_state:
         st.session_state.cookie_controller = CookieController()
     return st.session_state.cookie_controller
-COOKIE_NAME = "planner_user_session_v3"
+COOKIE_NAME = "planner_user_session_v4"  # v4 = podepsaný token místo holého username
+SESSION_KEYS = ["username", "name", "role", "authentication_status", "users_version", "users_checked_at"]
+
+
+def _start_session(user, cc=None, claims=None):
+    """
+    Uloží uživatele (ověřený záznam z DB) do session_state a vydá podepsaný token do cookie,
+    pokud se jméno / role liší od claims stávajícího tokenu. Bez COOKIE_KEY se token nevydává.
+    """
+    st.session_state["username"] = user['username']
+    st.session_state["name"] = user['name']
+    st.session_state["role"] = user.get('role') or 'viewer'
+    st.session_state["authentication_status"] = True
+    st.session_state["users_version"] = get_users_version()
+    st.session_state["users_checked_at"] = time.time()
+    if not COOKIE_KEY:
+        return
+    token_claims = {
+        'username': user['username'],
+        'name': user['name'],
+        'role': st.session_state["role"],  # jen nápověda – role se vždy bere z DB
+    }
+    if claims and all(claims.get(k) == v for k, v in token_claims.items()):
+        return
+    token = issue_token(token_claims, COOKIE_KEY)
+    (cc or get_cookie_controller()).set(COOKIE_NAME, token, max_age=TOKEN_TTL)
 
 
 def authenticate_user(username: str, password: str):
@@ -47,12 +72,7 @@ def authenticate_user(username: str, password: str):
 def login(username: str, password: str):
     user_data = authenticate_user(username, password)
     if user_data:
-        cc = get_cookie_controller()  # ← Nahrazeno zde
-        cc.set(COOKIE_NAME, user_data['username'], max_age=60*60*24*90)
-        st.session_state["username"] = user_data['username']
-        st.session_state["name"] = user_data['name']
-        st.session_state["role"] = user_data['role']
-        st.session_state["authentication_status"] = True
+        _start_session(user_data)
 
         st.success("Přihlášeno!")
         time.sleep(0.5)
@@ -61,33 +81,62 @@ def login(username: str, password: str):
         st.error("Přihlášení selhalo.")
 
 def logout():
-    cc = get_cookie_controller()  # ← Nahrazeno zde
-    cc.set(COOKIE_NAME, "", max_age=0)
-    for key in ["username", "name", "role", "authentication_status"]:
-        st.session_state.pop(key, None)
+    _clear_session(get_cookie_controller())
     st.success("Odhlášeno.")
     time.sleep(0.5)
     st.rerun()
 
+def _clear_session(cc):
+    cc.set(COOKIE_NAME, "", max_age=0)
+    for key in SESSION_KEYS:
+        st.session_state.pop(key, None)
+
 def check_login():
-    cc = get_cookie_controller()  # ← Nahrazeno zde
-    stored_username = cc.get(COOKIE_NAME)
-    if stored_username:
-        if "username" not in st.session_state:
-            try:
-                response = supabase.table('app_users')\
-                           .select("username, name, role")\
-                           .eq("username", stored_username)\
-                           .execute()
-                if response.data:
-                    user = response.data[0]
-                    st.session_state["username"] = user['username']
-                    st.session_state["name"] = user['name']
-                    st.session_state["role"] = user.get('role', 'viewer')
-                    st.session_state["authentication_status"] = True
-                    return True
-            except Exception as e:
-                print(f"Chyba obnovy session: {e}")
-                return False
+    """
+    Session ověřená v tomto procesu platí, dokud se nezmění verze uživatelů a nejdéle
+    USER_CACHE_TTL. Jinak se obnoví z podepsaného tokenu v cookie – token jen identifikuje
+    uživatele, jméno a roli vždy dodá záznam z DB (TTL cache get_user_record).
+    """
+    cc = get_cookie_controller()
+    token = cc.get(COOKIE_NAME)
+    if COOKIE_KEY and not token:
+        return False
+    if (st.session_state.get("username")
+            and st.session_state.get("users_version") == get_users_version()
+            and time.time() - st.session_state.get("users_checked_at", 0) < USER_CACHE_TTL):
         return True
-    return False
\ No newline at end of file
+    if COOKIE_KEY:
+        claims = verify_token(token, COOKIE_KEY)
+        if not claims:
+            return False
+        username = claims['username']
+    else:
+        claims, username = None, st.session_state.get("username")
+        if not username:
+            return False
+    try:
+        user = get_user_record(username)
+    except Exception as e:
+        print(f"Chyba obnovy session: {e}")
+        return False
+    if not user:
+        # Uživatel mezitím smazán
+        _clear_session(cc)
+        return False
+    _start_session(user, cc, claims)
+    return True
+
+def bootstrap_page(current_page):
+    """
+    Společný začátek každé stránky: page config, kontrola přihlášení (jinak přesměrování
+    na Home.py), sidebar. Vrátí (username, name, role, read_only).
+    """
+    st.set_page_config(page_title="Plánovač HK", layout="wide")
+    if not check_login():
+        st.switch_page("Home.py")
+        st.stop()
+    render_sidebar(current_page)
+    username = st.session_state.get("username", "neznámý")
+    name = st.session_state.get("name", "Uživatel")
+    role = st.session_state.get("role") or "viewer"
+    return username, name, role, role == "viewer"
@@ -0,0 +1,77 @@
+# utils/capacity.py
+"""
+Kapacitní model pracovišť: týdenní směnový vzor (hodiny po dnech Po–Ne), svátky volno,
+plánované odstávky (kapacita 0) a údržbová okna (ubírají hodiny za den).
+Profil se zkompiluje do matice hodin [pracoviště × den]; procenta využití jsou pak jen
+podíl matice zatížení (utils.occupancy) a kapacity – žádné smyčky po dnech.
+
+Uložení – tabulka workplace_capacity, jeden řádek na záznam:
+    id, workplace_id, kind ('pattern' | 'shutdown' | 'maintenance'),
+    weekday_hours (JSON pole 7 čísel, jen 'pattern'), holidays_off (bool, jen 'pattern'),
+    date_from, date_to (ISO, okna), hours (úbytek hodin za den, jen 'maintenance'), note
+Pracoviště bez vzoru má DEFAULT_WEEKLY_HOURS (nepřetržitý provoz, svátky volno).
+"""
+from datetime import date
+
+import numpy as np
+
+from utils.workcal import get_calendar
+
+DEFAULT_WEEKLY_HOURS = (24.0,) * 7
+WEEKDAY_LABELS = ['Po', 'Út', 'St', 'Čt', 'Pá', 'So', 'Ne']
+WINDOW_KINDS = {'shutdown': 'Odstávka', 'maintenance': 'Údržba'}
+
+
+def default_profile():
+    return {'weekly_hours': DEFAULT_WEEKLY_HOURS, 'holidays_off': True, 'windows': []}
+
+
+def build_profiles(rows):
+    """
+    {workplace_id: profil} z řádků workplace_capacity. Při více vzorech platí poslední (podle id).
+    Okno = (id, druh, od, do, hodiny).
+    """
+    profiles = {}
+    for row in sorted(rows, key=lambda r: r['id']):
+        profile = profiles.setdefault(row['workplace_id'], default_profile())
+        if row['kind'] == 'pattern':
+            profile['weekly_hours'] = tuple(float(h) for h in row['weekday_hours'])
+            profile['holidays_off'] = row.get('holidays_off') is not False
+        elif row['kind'] in WINDOW_KINDS:
+            profile['windows'].append((
+                row['id'], row['kind'],
+                date.fromisoformat(row['date_from']), date.fromisoformat(row['date_to']),
+                float(row.get('hours') or 0),
+            ))
+    return profiles
+
+
+def compile_capacity(profiles, workplace_ids, first, last):
+    """
+    Matice kapacity v hodinách tvaru (len(workplace_ids), dny [first, last]).
+    """
+    n_days = (last - first).days + 1
+    weekday = (np.arange(n_days) + first.weekday()) % 7
+    working = np.frombuffer(get_calendar('24').mask(first, last), dtype=np.uint8).astype(bool)  # = ne-svátek
+    matrix = np.empty((len(workplace_ids), n_days))
+    for row, wp_id in enumerate(workplace_ids):
+        profile = profiles.get(wp_id) or default_profile()
+        hours = np.asarray(profile['weekly_hours'], dtype=float)[weekday]
+        if profile['holidays_off']:
+            hours = np.where(working, hours, 0.0)
+        for _, kind, date_from, date_to, lost in profile['windows']:
+            i, j = max((date_from - first).days, 0), min((date_to - first).days, n_days - 1)
+            if i > j:
+                continue
+            hours[i:j + 1] = 0.0 if kind == 'shutdown' else np.maximum(hours[i:j + 1] - lost, 0.0)
+        matrix[row] = hours
+    return matrix
+
+
+def utilization_pct(load, capacity):
+    """
+    load / capacity * 100 po prvcích; tam, kde kapacita není, 0.
+    """
+    load = np.asarray(load, dtype=float)
+    capacity = np.asarray(capacity, dtype=float)
+    return np.divide(load * 100, capacity, out=np.zeros_like(load), where=capacity > 0)
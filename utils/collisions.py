@@ -0,0 +1,37 @@
+# utils/collisions.py
+"""
+Detekce kolizí úkolů na pracovištích jedním průchodem (sort + sweep).
+Data se porovnávají jako ISO řetězce 'YYYY-MM-DD' – lexikální pořadí = chronologické,
+takže není potřeba strptime.
+"""
+import heapq
+from collections import defaultdict
+
+
+def compute_collisions(tasks):
+    """
+    tasks: iterovatelné řádky s id, workplace_id, start_date, end_date.
+    Vrátí {task_id: set(ID kolidujících úkolů)} – jen úkoly, které nějakou kolizi mají.
+    """
+    by_wp = defaultdict(list)
+    for t in tasks:
+        by_wp[t['workplace_id']].append(t)
+    collisions = defaultdict(set)
+    for group in by_wp.values():
+        group.sort(key=lambda t: t['start_date'])
+        active = []  # halda (end_date, task_id) úkolů, které ještě běží
+        for t in group:
+            while active and active[0][0] < t['start_date']:
+                heapq.heappop(active)
+            for _, other_id in active:
+                collisions[t['id']].add(other_id)
+                collisions[other_id].add(t['id'])
+            heapq.heappush(active, (t['end_date'], t['id']))
+    return collisions
+
+
+def colliding_projects(collisions, tasks_by_id, task_id):
+    """
+    Projekty úkolů kolidujících s task_id (stejná odpověď jako get_colliding_projects).
+    """
+    return sorted({tasks_by_id[cid]['project_id'] for cid in collisions.get(task_id, ())}, key=str)
@@ -1,34 +1,92 @@
 # utils/common.py
 import streamlit as st
-from streamlit_authenticator import Authenticate
-from streamlit_authenticator.utilities.hasher import Hasher
-from supabase import create_client
 from datetime import datetime, timedelta, date
-import math
 import re
 import calendar
-from reportlab.lib.pagesizes import landscape, A4
-from reportlab.pdfgen import canvas as pdf_canvas
-from reportlab.lib.units import inch
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-import pandas as pd
-from st_aggrid import AgGrid, GridUpdateMode, DataReturnMode
-import plotly.express as px
-import os
+import itertools
+import threading
+import time
+from utils.recalc import plan_recalculation, reachable
+from utils.collisions import compute_collisions, colliding_projects
+from utils.intervals import IntervalIndexRegistry, is_scheduled
+from utils import workcal
+from utils.workcal import get_calendar, months_in_range
+# Těžké závislosti (supabase, pandas, plotly, reportlab, openpyxl, numpy, streamlit_authenticator)
+# se importují až ve funkcích, které je potřebují – stránka bez grafů/exportů je nenačítá.
 # ──────────────────────────────────────────────────────────────
 # KONFIGURACE
 # ──────────────────────────────────────────────────────────────
 SUPABASE_URL = st.secrets["supabase_url"]
 SUPABASE_KEY = st.secrets["supabase_key"]
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+@st.cache_resource(show_spinner=False)
+def get_supabase_client():
+    """
+    Jeden Supabase klient na proces, vytvořený až při prvním dotazu.
+    """
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+class _LazySupabase:
+    """
+    Zástupce za klienta: supabase.table(...) atd. funguje jako dřív, ale import
+    knihovny supabase (httpx, postgrest, realtime…) proběhne až při prvním použití.
+    """
+    def __getattr__(self, name):
+        return getattr(get_supabase_client(), name)
+supabase = _LazySupabase()
 COOKIE_NAME = 'planner_auth_cookie'
-COOKIE_KEY = st.secrets.get("cookie_key", "planner_streamlit_secret_key")
+COOKIE_KEY = st.secrets.get("cookie_key")  # bez klíče se session tokeny nevydávají (session jen v paměti)
 COOKIE_EXPIRY_DAYS = 30
 # ──────────────────────────────────────────────────────────────
+# STRÁNKOVANÉ ČTENÍ (PostgREST vrací max. ~1000 řádků na odpověď)
+# ──────────────────────────────────────────────────────────────
+PAGE_SIZE = 1000  # nesmí být větší než max-rows nastavené v Supabase (výchozí 1000)
+def iter_rows(build_query, page_size=PAGE_SIZE, key='id', order_by=None):
+    """
+    Generátor řádků libovolného selectu po stránkách – nic se tiše neořízne.
+    build_query: funkce bez argumentů vracející NOVÝ builder (např. lambda: supabase.table('x').select('*')),
+    protože builder s .range()/.gt() nejde použít znovu.
+    key='id'  → keyset stránkování (order by key, key > poslední); key musí být v projekci a unikátní.
+    key=None  → range/offset stránkování seřazené podle order_by (sloupec nebo n-tice sloupců);
+                kombinace musí být unikátní, jinak se řádky se shodným klíčem na hranici stránky
+                mohou přeskočit nebo zopakovat (Postgres nezaručuje pořadí shod).
+    """
+    last_key, offset = None, 0
+    while True:
+        query = build_query()
+        if key:
+            query = query.order(key)
+            if last_key is not None:
+                query = query.gt(key, last_key)
+            rows = query.limit(page_size).execute().data
+        else:
+            for column in ((order_by,) if isinstance(order_by, str) else order_by or ()):
+                query = query.order(column)
+            rows = query.range(offset, offset + page_size - 1).execute().data
+            offset += len(rows)
+        yield from rows
+        if len(rows) < page_size:
+            return
+        if key:
+            last_key = rows[-1][key]
+def iter_chunks(build_query, chunk_size=PAGE_SIZE, **kwargs):
+    """
+    Stejné jako iter_rows, ale po blocích (list) max. chunk_size řádků – omezená paměť.
+    """
+    chunk = []
+    for row in iter_rows(build_query, **kwargs):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+def fetch_all(build_query, **kwargs):
+    return list(iter_rows(build_query, **kwargs))
+# ──────────────────────────────────────────────────────────────
 # HASHOVÁNÍ HESLA
 # ──────────────────────────────────────────────────────────────
 def hash_single_password(plain_password: str) -> str:
+    from streamlit_authenticator.utilities.hasher import Hasher
     temp_credentials = {
         "usernames": {"temp_user": {"name": "Temp", "password": plain_password}}
     }
@@ -39,11 +97,12 @@ def hash_single_password(plain_password: str) -> str:
 # ──────────────────────────────────────────────────────────────
 def load_users_from_db():
     try:
-        response = supabase.table('app_users')\
-                   .select("username, name, password_hash, role, email")\
-                   .execute()
+        rows = fetch_all(
+            lambda: supabase.table('app_users').select("username, name, password_hash, role, email"),
+            key='username'
+        )
         users_dict = {}
-        for row in response.data:
+        for row in rows:
             users_dict[row['username']] = {
                 'name': row['name'],
                 'password': row['password_hash'],
@@ -58,46 +117,18 @@ def load_users_from_db():
 #============================
 # ČESKÉ SVÁTKY A POMOCNÉ FUNKCE
 # ============================
-# ... (zde zůstávají všechny původní funkce beze změny - get_easter, get_holidays, is_holiday, ... až po recalculate_project)
-def get_easter(year):
-    a = year % 19
-    b = year // 100
-    c = year % 100
-    d = (19 * a + b - b // 4 - ((b - (b + 8) // 25 + 1) // 3) + 15) % 30
-    e = (32 + 2 * (b % 4) + 2 * (c // 4) - d - (c % 4)) % 7
-    f = d + e - 7 * ((a + 11 * d + 22 * e) // 451) + 114
-    month = f // 31
-    day = f % 31 + 1
-    easter_sunday = date(year, month, day)
-    return easter_sunday + timedelta(days=1)
-def get_holidays(year):
-    return [
-        date(year, 1, 1),
-        get_easter(year),
-        date(year, 5, 1),
-        date(year, 5, 8),
-        date(year, 7, 5),
-        date(year, 7, 6),
-        date(year, 9, 28),
-        date(year, 10, 28),
-        date(year, 11, 17),
-        date(year, 12, 24),
-        date(year, 12, 25),
-        date(year, 12, 26),
-    ]
+# Svátky a pracovní dny jsou předpočítané v utils/workcal.py (bitmapa + prefixové součty)
 def is_holiday(dt):
-    holidays = get_holidays(dt.year)
-    if dt.month == 1:
-        holidays += get_holidays(dt.year - 1)
-    if dt.month == 12:
-        holidays += get_holidays(dt.year + 1)
-    return dt in holidays
+    return workcal.is_holiday(dt)
 def is_weekend_or_holiday(dt):
     return dt.weekday() >= 5 or is_holiday(dt)
 def is_working_day(dt, mode):
-    if mode == '7.5' and dt.weekday() >= 5:
-        return False
-    return not is_holiday(dt)
+    return get_calendar(mode).is_working_day(dt)
+def count_working_days(start, end, mode):
+    """
+    Počet pracovních dní v [start, end] (date) včetně obou krajů.
+    """
+    return get_calendar(mode).count(start, end)
 def normalize_date_str(date_str):
     if not date_str:
         return None
@@ -214,31 +245,112 @@ def validate_ddmmyyyy(date_str):
 def calculate_end_date(start_yyyymmdd, hours, mode):
     if not start_yyyymmdd:
         return None
-    capacity = 7.5 if mode == '7.5' else 24.0
-    days_needed = math.ceil(hours / capacity)
-    current = datetime.strptime(start_yyyymmdd, '%Y-%m-%d').date()
-    days_count = 0
-    while days_count < days_needed:
-        if is_working_day(current, mode):
-            days_count += 1
-        current += timedelta(days=1)
-    return (current - timedelta(days=1)).strftime('%Y-%m-%d')
+    start = datetime.strptime(start_yyyymmdd, '%Y-%m-%d').date()
+    return get_calendar(mode).end_date(start, hours, mode).strftime('%Y-%m-%d')
 def get_next_working_day_after(date_str, capacity_mode):
     if not date_str:
         return None
-    current = datetime.strptime(date_str, '%Y-%m-%d').date() + timedelta(days=1)
-    while not is_working_day(current, capacity_mode):
-        current += timedelta(days=1)
-    return current.strftime('%Y-%m-%d')
+    current = datetime.strptime(date_str, '%Y-%m-%d').date()
+    return get_calendar(capacity_mode).next_working_day_after(current).strftime('%Y-%m-%d')
 # ============================
 # DATABÁZOVÉ FUNKCE
 # ============================
 # ... (zde zůstávají všechny původní funkce beze změny - init_db až po delete_project)
 def init_db():
     pass
+# Verze dat – zvyšuje se při každém zápisu, slouží jako klíč cache odvozených pohledů
+@st.cache_resource(show_spinner=False)
+def _data_version_state():
+    return {'version': 0, 'lock': threading.Lock()}
+def get_data_version():
+    return _data_version_state()['version']
+def bump_data_version():
+    state = _data_version_state()
+    with state['lock']:
+        state['version'] += 1
+        return state['version']
+# Sběrnice invalidací – zápisy publikují témata, odvozené cache je používají jako klíč / přihlásí se k nim
+# Témata: 'workplaces', 'projects', 'capacity', ('project', id), ('workplace', id), ('month', rok, měsíc), ('year', rok)
+@st.cache_resource(show_spinner=False)
+def _invalidation_bus():
+    return {'versions': {}, 'subscribers': {}, 'lock': threading.Lock()}
+def topic_version(*topics):
+    """
+    Verze témat – klíč cache odvozeného pohledu, změní se jen po publikaci některého z nich.
+    """
+    versions = _invalidation_bus()['versions']
+    return tuple(versions.get(topic, 0) for topic in topics)
+def subscribe(topic, name, callback):
+    """
+    Přihlásí callback(topic) k tématu; name brání dvojí registraci při reloadu modulu.
+    """
+    bus = _invalidation_bus()
+    with bus['lock']:
+        bus['subscribers'].setdefault(topic, {})[name] = callback
+def publish(*topics):
+    """
+    Oznámí změnu témat: zvýší jejich verze i verzi dat a zavolá přihlášené callbacky.
+    """
+    bus = _invalidation_bus()
+    topics = set(topics)
+    with bus['lock']:
+        for topic in topics:
+            bus['versions'][topic] = bus['versions'].get(topic, 0) + 1
+        callbacks = [(topic, cb) for topic in topics
+                     for cb in bus['subscribers'].get(topic, {}).values()]
+    bump_data_version()
+    for topic, cb in callbacks:
+        cb(topic)
+def _month_topics(start_date, end_date):
+    if not start_date:
+        return []
+    end_date = end_date or start_date
+    y, m = int(start_date[:4]), int(start_date[5:7])
+    end_y, end_m = int(end_date[:4]), int(end_date[5:7])
+    topics = []
+    while (y, m) <= (end_y, end_m):
+        topics += [('month', y, m), ('year', y)]
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return topics
+def task_topics(*rows):
+    """
+    Témata dotčená úkolem: jeho projekt, pracoviště a měsíce, do kterých zasahuje.
+    Předávat stav před i po změně (přesun jinam zneplatní obě místa).
+    """
+    topics = set()
+    for row in rows:
+        if not row:
+            continue
+        if row.get('project_id') is not None:
+            topics.add(('project', row['project_id']))
+        if row.get('workplace_id') is not None:
+            topics.add(('workplace', row['workplace_id']))
+        topics.update(_month_topics(row.get('start_date'), row.get('end_date')))
+    return topics
+# Číselníky pracovišť a projektů – sdílená cache v procesu (jeden bulk load za TTL)
+LOOKUP_CACHE_TTL = 300  # sekundy
+@st.cache_resource(ttl=LOOKUP_CACHE_TTL, show_spinner=False)
+def _load_lookup_tables():
+    """
+    Načte celé tabulky workplaces a projects jedním dotazem na tabulku.
+    Výsledek je sdílený pro všechny sessions – nemodifikovat!
+    """
+    wp_rows = fetch_all(lambda: supabase.table('workplaces').select('id, name'))
+    proj_rows = fetch_all(lambda: supabase.table('projects').select('id, name, color'))
+    return {
+        'workplaces': {row['id']: row['name'] for row in wp_rows},
+        'projects': {
+            row['id']: {'name': row['name'], 'color': row.get('color', '#4285F4')}
+            for row in proj_rows
+        },
+    }
+def invalidate_lookup_cache(topic=None):
+    _load_lookup_tables.clear()
+subscribe('workplaces', 'lookup_tables', invalidate_lookup_cache)
+subscribe('projects', 'lookup_tables', invalidate_lookup_cache)
 def get_projects():
-    response = supabase.table('projects').select('id, name, color').execute()
-    return [(row['id'], row['name'], row.get('color', '#4285F4')) for row in response.data]
+    projects = _load_lookup_tables()['projects']
+    return [(pid, p['name'], p['color']) for pid, p in projects.items()]
 def get_safe_project_colors():
     return [
         ('Modrá klasická',    '#4285F4'),
@@ -268,73 +380,243 @@ def detect_collisions_in_month(tasks_in_month):
     Vrátí pro každý task_id seznam ID úkolů, se kterými koliduje.
     """
     from collections import defaultdict
-   
-    wp_groups = defaultdict(list)
-    for t in tasks_in_month:
-        wp_groups[t['workplace_id']].append(t)
-   
     collisions = defaultdict(list)  # task_id → list kolizních task_id
-   
-    for wp_id, group in wp_groups.items():
-        group.sort(key=lambda x: datetime.strptime(x['start_date'], '%Y-%m-%d'))
-       
-        for i in range(len(group)):
-            t1 = group[i]
-            t1_start = datetime.strptime(t1['start_date'], '%Y-%m-%d').date()
-            t1_end = datetime.strptime(t1['end_date'], '%Y-%m-%d').date()
-           
-            for j in range(i + 1, len(group)):
-                t2 = group[j]
-                t2_start = datetime.strptime(t2['start_date'], '%Y-%m-%d').date()
-               
-                if t2_start > t1_end:
-                    break
-               
-                t2_end = datetime.strptime(t2['end_date'], '%Y-%m-%d').date()
-               
-                if not (t1_end < t2_start or t1_start > t2_end):
-                    collisions[t1['id']].append(t2['id'])
-                    collisions[t2['id']].append(t1['id'])
-   
+    for task_id, ids in compute_collisions(tasks_in_month).items():
+        collisions[task_id] = sorted(ids)
     return collisions
+@st.cache_data(ttl=600, max_entries=16, show_spinner=False)
+def _year_occupancy(year, version):
+    rows = snapshot_tasks_in_range(date(year, 1, 1), date(year, 12, 31))
+    from utils.occupancy import occupancy_matrix
+    wp_ids = [wp_id for wp_id, _ in get_workplaces()]
+    return wp_ids, occupancy_matrix(rows, wp_ids, year)
+def get_year_occupancy(year):
+    """
+    (workplace_ids, matice hodin [pracoviště × den]) pro rok – cache podle verze témat roku a pracovišť.
+    """
+    return _year_occupancy(year, topic_version(('year', year), 'workplaces'))
+# Kapacita pracovišť (utils/capacity.py) – směnový vzor, odstávky, údržba → předkompilované roční matice
+@st.cache_data(ttl=600, show_spinner=False)
+def _load_capacity_rows():
+    try:
+        return fetch_all(lambda: supabase.table('workplace_capacity').select('*'))
+    except Exception as e:
+        # Bez tabulky workplace_capacity platí pro všechna pracoviště výchozí vzor
+        print(f"[WARN] Načítání kapacit pracovišť selhalo: {e}")
+        return []
+def invalidate_capacity_cache(topic=None):
+    _load_capacity_rows.clear()
+subscribe('capacity', 'capacity_rows', invalidate_capacity_cache)
+def get_capacity_profiles():
+    """
+    {workplace_id: profil} – pracoviště bez záznamu v tabulce chybí (platí výchozí vzor).
+    """
+    from utils.capacity import build_profiles
+    return build_profiles(_load_capacity_rows())
+@st.cache_data(ttl=600, max_entries=16, show_spinner=False)
+def _year_capacity(year, version):
+    from utils.capacity import compile_capacity
+    wp_ids = [wp_id for wp_id, _ in get_workplaces()]
+    return wp_ids, compile_capacity(get_capacity_profiles(), wp_ids, date(year, 1, 1), date(year, 12, 31))
+def get_year_capacity(year):
+    """
+    (workplace_ids, matice kapacity v hodinách [pracoviště × den]) pro rok – cache podle verze kapacit a pracovišť.
+    """
+    return _year_capacity(year, topic_version('capacity', 'workplaces'))
+def get_capacity_matrix(workplace_ids, date_from, date_to):
+    """
+    Kapacita [pracoviště × den] pro dny [date_from, date_to] – výřezy z ročních matic, bez výpočtu po dnech.
+    Pracoviště, které roční cache ještě nezná (např. přidané jiným procesem), se dopočítá zvlášť.
+    """
+    import numpy as np
+    from utils.capacity import compile_capacity
+    parts = []
+    for year in range(date_from.year, date_to.year + 1):
+        wp_ids, matrix = get_year_capacity(year)
+        row_of = {wp_id: i for i, wp_id in enumerate(wp_ids)}
+        first = date(year, 1, 1)
+        lo = (max(date_from, first) - first).days
+        hi = (min(date_to, date(year, 12, 31)) - first).days
+        part = np.empty((len(workplace_ids), hi - lo + 1))
+        known = [i for i, wp_id in enumerate(workplace_ids) if wp_id in row_of]
+        part[known] = matrix[[row_of[workplace_ids[i]] for i in known], lo:hi + 1]
+        missing = [i for i, wp_id in enumerate(workplace_ids) if wp_id not in row_of]
+        if missing:
+            part[missing] = compile_capacity(get_capacity_profiles(), [workplace_ids[i] for i in missing],
+                                             first + timedelta(days=lo), first + timedelta(days=hi))
+        parts.append(part)
+    return np.concatenate(parts, axis=1)
+def save_capacity_pattern(workplace_id, weekday_hours, holidays_off=True):
+    """
+    Nastaví týdenní směnový vzor pracoviště (7 hodnot Po–Ne) – nahradí předchozí.
+    Nejdřív vloží nový vzor, pak smaže starší: při selhání insertu zůstane starý vzor,
+    při selhání mazání platí nový (build_profiles bere vzor s nejvyšším id).
+    """
+    inserted = supabase.table('workplace_capacity').insert({
+        'workplace_id': workplace_id,
+        'kind': 'pattern',
+        'weekday_hours': [float(h) for h in weekday_hours],
+        'holidays_off': bool(holidays_off),
+    }).execute().data
+    try:
+        supabase.table('workplace_capacity').delete()\
+            .eq('workplace_id', workplace_id).eq('kind', 'pattern').lt('id', inserted[0]['id']).execute()
+    finally:
+        publish('capacity')
+def add_capacity_window(workplace_id, kind, date_from, date_to, hours=0.0, note=''):
+    """
+    Přidá odstávku (kind='shutdown', kapacita 0) nebo údržbu (kind='maintenance', −hours za den).
+    """
+    supabase.table('workplace_capacity').insert({
+        'workplace_id': workplace_id,
+        'kind': kind,
+        'date_from': _iso_date(date_from),
+        'date_to': _iso_date(date_to),
+        'hours': float(hours or 0),
+        'note': note or None,
+    }).execute()
+    publish('capacity')
+def delete_capacity_window(window_id):
+    supabase.table('workplace_capacity').delete().eq('id', window_id).execute()
+    publish('capacity')
+def _month_version(year, month):
+    # Měsíční pohledy závisí na úkolech měsíce a na číselnících projektů / pracovišť
+    return topic_version(('month', year, month), 'projects', 'workplaces')
+@st.cache_data(ttl=600, max_entries=24, show_spinner=False)
+def _month_figure_json(year, month, version):
+    first_day = date(year, month, 1)
+    last_day = first_day + timedelta(days=calendar.monthrange(year, month)[1] - 1)
+    from utils.hmg_figure import build_month_figure
+    tasks = snapshot_tasks_in_range(first_day, last_day)
+    fig = build_month_figure(year, month, tasks, _load_lookup_tables()['projects'], get_workplace_name)
+    return fig.to_json() if fig is not None else None
+def get_month_figure(year, month):
+    """
+    Graf HMG měsíční (go.Figure) nebo None – serializovaný graf v cache podle verze dat měsíce.
+    """
+    import plotly.io as pio
+    fig_json = _month_figure_json(year, month, _month_version(year, month))
+    return pio.from_json(fig_json) if fig_json else None
+@st.cache_data(ttl=600, max_entries=16, show_spinner=False)
+def _gantt_figure_json(date_from, date_to, project_ids, workplace_ids, detail, version):
+    from utils.gantt_gl import build_gantt_figure
+    tasks = [
+        t for t in snapshot_tasks_in_range(date_from, date_to)
+        if (not project_ids or t['project_id'] in project_ids)
+        and (not workplace_ids or t['workplace_id'] in workplace_ids)
+    ]
+    fig = build_gantt_figure(tasks, _load_lookup_tables()['projects'], get_workplace_name,
+                             date_from, date_to, detail=detail)
+    return fig.to_json() if fig is not None else None
+def get_gantt_figure(date_from, date_to, project_ids=(), workplace_ids=(), detail=None):
+    """
+    WebGL Gantt pro libovolný rozsah (volitelně jen vybrané projekty / pracoviště).
+    detail=None → jednotlivé úkoly do ~kvartálu, nad tím souhrnné bloky po pracovištích.
+    Cache podle verze dotčených měsíců a číselníků.
+    """
+    import plotly.io as pio
+    topics = [('month', y, m) for y, m in months_in_range(date_from, date_to)]
+    version = topic_version(*topics, 'projects', 'workplaces')
+    fig_json = _gantt_figure_json(date_from, date_to, tuple(sorted(project_ids, key=str)),
+                                  tuple(sorted(workplace_ids)), detail, version)
+    return pio.from_json(fig_json) if fig_json else None
+@st.cache_data(ttl=600, max_entries=32, show_spinner=False)
+def _project_date_span(project_ids, version):
+    rows = fetch_all(lambda: _tasks_in_range_query(None, None, None, None, True, 'start_date, end_date')
+                     .in_('project_id', list(project_ids)))
+    if not rows:
+        return None
+    return (date.fromisoformat(min(t['start_date'] for t in rows)),
+            date.fromisoformat(max(t['end_date'] for t in rows)))
+def project_date_span(project_ids):
+    """
+    (první začátek, poslední konec) naplánovaných úkolů projektů, nebo None.
+    Cache podle projektů a verze jejich témat – rerun stránky do DB nejde.
+    """
+    project_ids = tuple(sorted(project_ids, key=str))
+    topics = [('project', pid) for pid in project_ids]
+    return _project_date_span(project_ids, topic_version('projects', *topics))
+@st.cache_data(ttl=600, max_entries=24, show_spinner=False)
+def _month_pdf(year, month, version):
+    first_day = date(year, month, 1)
+    last_day = first_day + timedelta(days=calendar.monthrange(year, month)[1] - 1)
+    from utils.pdf_export import render_month_pdf
+    tasks = snapshot_tasks_in_range(first_day, last_day)
+    return render_month_pdf(year, month, tasks, _load_lookup_tables()['projects'], get_workplace_name)
+def get_month_pdf(year, month):
+    """
+    PDF HMG měsíční (bytes) – cache podle (rok, měsíc, verze témat měsíce / projektů / pracovišť).
+    """
+    return _month_pdf(year, month, _month_version(year, month))
+def month_report_jobs(date_from, date_to):
+    """
+    Vstupy pro hromadný PDF report (utils.pdf_batch) – jeden job na měsíc, data ze sdíleného snapshotu.
+    """
+    lookups = _load_lookup_tables()
+    jobs = []
+    for year, month in months_in_range(date_from, date_to):
+        first_day = date(year, month, 1)
+        last_day = first_day + timedelta(days=calendar.monthrange(year, month)[1] - 1)
+        tasks = snapshot_tasks_in_range(first_day, last_day)
+        jobs.append((year, month, tasks, lookups['projects'], lookups['workplaces']))
+    return jobs
 def get_project_choices():
     projects = get_projects()
     return [str(p[0]) for p in projects] if projects else []
 
 def get_project_name(project_id):
-    response = supabase.table('projects').select('name').eq('id', project_id).execute()
-    return response.data[0]['name'] if response.data else f"P{project_id}"
+    project = _load_lookup_tables()['projects'].get(project_id)
+    return project['name'] if project else f"P{project_id}"
 
+# Audit (change_log, logs) – zápis na pozadí dávkami, vlákno skriptu na DB nečeká (utils.audit)
+@st.cache_resource(show_spinner=False)
+def _audit_writer():
+    from utils.audit import AuditWriter
+    client = get_supabase_client()  # z vlákna skriptu – vlákno na pozadí nemá Streamlit kontext
+    return AuditWriter(lambda table, rows: client.table(table).insert(rows).execute())
+def get_audit_stats():
+    """
+    {'queued', 'written', 'dropped', 'failed', 'batches'} – hloubka auditní fronty a počítadla řádků.
+    """
+    return _audit_writer().stats()
+def flush_audit():
+    """
+    Počká na zápis fronty – před čtením / mazáním change_log, aby v DB byly i čerstvé záznamy.
+    """
+    return _audit_writer().flush()
+def _log_change(rows):
+    _audit_writer().enqueue('change_log', rows)
 def log_action(user, action, task_id, details):
-    try:
-        supabase.table('logs').insert({
-            'user': user,
-            'action': action,
-            'task_id': task_id,
-            'details': details
-        }).execute()
-    except Exception as e:
-        # Pokud nechceš, aby logování blokovalo app, jen vypíše chybu (nebo ji ignoruj)
-        print(f"Chyba při logování: {e}")
+    log_actions([(user, action, task_id, details)])
+def log_actions(entries):
+    """
+    Zápis do logs přes auditní frontu: entries = [(user, action, task_id, details), ...].
+    """
+    if entries:
+        _audit_writer().enqueue('logs', [
+            {'user': user, 'action': action, 'task_id': task_id, 'details': details}
+            for user, action, task_id, details in entries
+        ])
 def get_workplaces():
-    response = supabase.table('workplaces').select('id, name').execute()
-    return [(row['id'], row['name']) for row in response.data]
+    return list(_load_lookup_tables()['workplaces'].items())
 def get_workplace_name(wp_id):
-    response = supabase.table('workplaces').select('name').eq('id', wp_id).execute()
-    return response.data[0]['name'] if response.data else f"ID {wp_id}"
+    name = _load_lookup_tables()['workplaces'].get(wp_id)
+    return name if name is not None else f"ID {wp_id}"
 def add_workplace(name):
     if not name.strip():
         return False
     try:
         supabase.table('workplaces').insert({'name': name.strip()}).execute()
+        publish('workplaces')
         return True
     except Exception:
         return False
 def delete_workplace(wp_id):
-    response = supabase.table('tasks').select('id').eq('workplace_id', wp_id).execute()
+    response = supabase.table('tasks').select('id').eq('workplace_id', wp_id).limit(1).execute()
     if response.data:
         return False
     supabase.table('workplaces').delete().eq('id', wp_id).execute()
+    publish('workplaces', ('workplace', wp_id))
     return True
 def add_project(project_id, name, color):
     try:
@@ -343,12 +625,225 @@ def add_project(project_id, name, color):
             'name': name,
             'color': color
         }).execute()
+        publish('projects', ('project', project_id))
         return True
     except Exception:
         return False
+def _iso_date(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+def fetch_tasks_in_range(date_from=None, date_to=None, workplace_id=None, status=None,
+                         exclude_canceled=True, columns='*'):
+    """
+    Naplánované úkoly, jejichž [start_date, end_date] zasahuje do [date_from, date_to].
+    Filtrování běží na serveru – velikost odpovědi odpovídá oknu, ne celé tabulce.
+    date_from / date_to: date nebo 'YYYY-MM-DD', None = neomezeno.
+    status: jeden stav nebo seznam stavů; jinak se (volitelně) vynechají zrušené.
+    """
+    return fetch_all(lambda: _tasks_in_range_query(date_from, date_to, workplace_id, status,
+                                                   exclude_canceled, columns))
+def _tasks_in_range_query(date_from, date_to, workplace_id, status, exclude_canceled, columns):
+    # Keyset stránkování potřebuje id v projekci
+    if columns != '*' and 'id' not in [c.strip() for c in columns.split(',')]:
+        columns = f'id, {columns}'
+    query = supabase.table('tasks')\
+        .select(columns)\
+        .not_.is_('start_date', 'null')\
+        .not_.is_('end_date', 'null')
+    if date_to is not None:
+        query = query.lte('start_date', _iso_date(date_to))
+    if date_from is not None:
+        query = query.gte('end_date', _iso_date(date_from))
+    if workplace_id is not None:
+        query = query.eq('workplace_id', workplace_id)
+    if isinstance(status, (list, tuple, set)):
+        query = query.in_('status', list(status))
+    elif status:
+        query = query.eq('status', status)
+    elif exclude_canceled:
+        query = query.neq('status', 'canceled')
+    return query
+# Export plánu do Excelu – řádky tečou z DB po stránkách rovnou do write-only listů
+def _export_tasks_query(date_from, date_to, workplace_id):
+    if date_from is None and date_to is None:
+        # Celá historie vč. nenaplánovaných a zrušených úkolů
+        query = supabase.table('tasks').select('*')
+        return query.eq('workplace_id', workplace_id) if workplace_id is not None else query
+    return _tasks_in_range_query(date_from, date_to, workplace_id, None, False, '*')
+def _export_task_rows(date_from, date_to, workplace_id):
+    from utils.excel_export import task_row
+    for task in iter_rows(lambda: _export_tasks_query(date_from, date_to, workplace_id)):
+        yield task_row(task, get_workplace_name)
+CHANGE_LOG_ID_CHUNK = 200  # task_id v jednom .in_() filtru – drží URL dotazu v rozumné délce
+def _export_change_log_rows(year, workplace_id):
+    """
+    Řádky change_log (volitelně jen rok / pracoviště) seřazené podle času. U pracoviště se filtruje
+    na serveru po blocích task_id a seřazené proudy bloků se slévají (heapq.merge).
+    """
+    import heapq
+    from utils.excel_export import change_log_row
+    def build_query(task_ids=None):
+        query = supabase.table('change_log').select('id, change_time, task_id, description, changed_by')
+        if year:
+            query = query.gte('change_time', f'{year}-01-01').lt('change_time', f'{year + 1}-01-01')
+        if task_ids is not None:
+            query = query.in_('task_id', task_ids)
+        return query
+    def stream(task_ids=None):
+        return iter_rows(lambda: build_query(task_ids), key=None, order_by=('change_time', 'id'))
+    if workplace_id is None:
+        entries = stream()
+    else:
+        task_ids = sorted(row['id'] for row in iter_rows(
+            lambda: supabase.table('tasks').select('id').eq('workplace_id', workplace_id)))
+        entries = heapq.merge(
+            *(stream(task_ids[i:i + CHANGE_LOG_ID_CHUNK]) for i in range(0, len(task_ids), CHANGE_LOG_ID_CHUNK)),
+            key=lambda entry: (entry['change_time'], entry['id'])
+        )
+    for entry in entries:
+        yield change_log_row(entry)
+def _scheduled_date_bounds():
+    first = supabase.table('tasks').select('start_date').not_.is_('start_date', 'null')\
+        .order('start_date').limit(1).execute().data
+    last = supabase.table('tasks').select('end_date').not_.is_('end_date', 'null')\
+        .order('end_date', desc=True).limit(1).execute().data
+    if not first or not last:
+        return None
+    return date.fromisoformat(first[0]['start_date']), date.fromisoformat(last[0]['end_date'])
+def export_schedule_xlsx(sheets_by='workplace', year=None, workplace_id=None, include_change_log=True):
+    """
+    Export plánu do .xlsx (bytes) bez DataFrame – paměť nezávisí na počtu řádků.
+    sheets_by: 'workplace' = list na pracoviště, 'month' = list na měsíc.
+    year: jen úkoly zasahující do roku (None = celá historie), workplace_id: jen jedno pracoviště.
+    """
+    from utils.excel_export import write_workbook, TASK_COLUMNS, CHANGE_LOG_COLUMNS
+    from utils.occupancy import MONTH_NAMES
+    year_from = date(year, 1, 1) if year else None
+    year_to = date(year, 12, 31) if year else None
+    if sheets_by == 'month':
+        bounds = (year_from, year_to) if year else _scheduled_date_bounds()
+        months = months_in_range(*bounds) if bounds else []
+        sheets = (
+            (f"{MONTH_NAMES[m - 1]} {y}", TASK_COLUMNS,
+             _export_task_rows(date(y, m, 1), date(y, m, calendar.monthrange(y, m)[1]), workplace_id))
+            for y, m in months
+        )
+    else:
+        workplaces = [(wp_id, wp_name) for wp_id, wp_name in get_workplaces()
+                      if workplace_id is None or wp_id == workplace_id]
+        sheets = (
+            (wp_name, TASK_COLUMNS, _export_task_rows(year_from, year_to, wp_id))
+            for wp_id, wp_name in workplaces
+        )
+    if include_change_log:
+        flush_audit()
+        change_log = [('Change log', CHANGE_LOG_COLUMNS, _export_change_log_rows(year, workplace_id))]
+        sheets = itertools.chain(sheets, change_log)
+    return write_workbook(sheets)
+# Sdílený snapshot dat – jeden pro celý proces, znovu se načte jen při změně verze dat.
+# Drží jen „živé“ úkoly: naplánované s koncem od horizontu (dnes − SNAPSHOT_HISTORY_DAYS)
+# a nenaplánované; okna sahající před horizont se čtou z DB s filtrem na serveru.
+SNAPSHOT_MAX_AGE = 300  # sekundy – pojistka pro změny provedené mimo tento proces
+SNAPSHOT_HISTORY_DAYS = 62
+@st.cache_resource(show_spinner=False)
+def _snapshot_holder():
+    return {'snapshot': None, 'lock': threading.Lock()}
+def _load_snapshot(version):
+    horizon = date.today() - timedelta(days=SNAPSHOT_HISTORY_DAYS)
+    tasks = fetch_tasks_in_range(date_from=horizon, exclude_canceled=False)
+    tasks += fetch_all(lambda: supabase.table('tasks').select('*')
+                       .or_('start_date.is.null,end_date.is.null'))
+    deps = fetch_all(
+        lambda: supabase.table('task_dependencies').select('task_id, parent_id'),
+        key=None, order_by=('task_id', 'parent_id')
+    )
+    parent_of, children_of = {}, {}
+    for dep in deps:
+        parent_of.setdefault(dep['task_id'], dep['parent_id'])
+        children_of.setdefault(dep['parent_id'], []).append(dep['task_id'])
+    lookups = _load_lookup_tables()
+    return {
+        'version': version,
+        'loaded_at': time.time(),
+        'horizon': horizon.isoformat(),
+        'tasks': {t['id']: t for t in tasks},
+        'dependencies': deps,
+        'parent_of': parent_of,
+        'children_of': children_of,
+        'workplaces': lookups['workplaces'],
+        'projects': lookups['projects'],
+    }
+def _snapshot_is_stale(snap):
+    return (snap is None or snap['version'] != get_data_version()
+            or time.time() - snap['loaded_at'] > SNAPSHOT_MAX_AGE)
+def get_snapshot():
+    """
+    Sdílený snapshot tasks / task_dependencies / workplaces / projects s razítkem verze.
+    Všechny sessions čtou tytéž objekty bez kopírování – NEMODIFIKOVAT (řádek si případně zkopírovat).
+    """
+    holder = _snapshot_holder()
+    snap = holder['snapshot']
+    if _snapshot_is_stale(snap):
+        with holder['lock']:
+            snap = holder['snapshot']
+            if _snapshot_is_stale(snap):
+                # Verzi čteme před načtením – zápis během načítání vynutí další reload
+                snap = _load_snapshot(get_data_version())
+                holder['snapshot'] = snap
+    return snap
+def get_snapshot_stamp():
+    """
+    Razítko aktuálního snapshotu (verze dat, čas načtení) – změní se po zápisu i po pojistném reloadu.
+    Klíč pro znovupoužití dat odvozených ze snapshotu (např. periodicky obnovované fragmenty).
+    """
+    snap = get_snapshot()
+    return snap['version'], snap['loaded_at']
+def snapshot_tasks_in_range(date_from=None, date_to=None, workplace_id=None, exclude_canceled=True):
+    """
+    Obdoba fetch_tasks_in_range nad sdíleným snapshotem (bez dotazu do DB), pokud okno
+    začíná od horizontu snapshotu; historická / neomezená okna jdou do DB (fetch_tasks_in_range).
+    """
+    date_from, date_to = _iso_date(date_from), _iso_date(date_to)
+    snap = get_snapshot()
+    if date_from is None or date_from < snap['horizon']:
+        return fetch_tasks_in_range(date_from, date_to, workplace_id, exclude_canceled=exclude_canceled)
+    return [
+        t for t in snap['tasks'].values()
+        if t['start_date'] and t['end_date']
+        and (date_to is None or t['start_date'] <= date_to)
+        and (date_from is None or t['end_date'] >= date_from)
+        and (workplace_id is None or t['workplace_id'] == workplace_id)
+        and not (exclude_canceled and t['status'] == 'canceled')
+    ]
+@st.cache_data(ttl=SNAPSHOT_MAX_AGE, max_entries=8, show_spinner=False)
+def _dashboard_kpis(day, version):
+    from utils.kpi import compute_kpis, window_end
+    tasks = snapshot_tasks_in_range(date_from=day)
+    wp_ids = [wp_id for wp_id, _ in get_workplaces()]
+    return compute_kpis(tasks, wp_ids, day, get_capacity_matrix(wp_ids, day, window_end(day)))
+def get_dashboard_kpis(day=None):
+    """
+    Agregace přehledového dashboardu (utils.kpi) – jeden vektorový průchod, cache podle (den, verze dat).
+    """
+    day = day or date.today()
+    return _dashboard_kpis(day, get_data_version())
 def get_tasks(project_id):
-    response = supabase.table('tasks').select('*').eq('project_id', project_id).execute()
-    return response.data
+    return fetch_all(lambda: supabase.table('tasks').select('*').eq('project_id', project_id))
+@st.cache_resource(ttl=SNAPSHOT_MAX_AGE, max_entries=64, show_spinner=False)
+def _project_tasks(project_id, version):
+    return sorted(get_tasks(project_id), key=lambda t: t['id'])
+def get_project_tasks(project_id):
+    """
+    Úkoly projektu pro zobrazení (vč. historie, cache podle verze tématu projektu) – NEMODIFIKOVAT.
+    Pro zápisy a přepočet používat get_tasks (čte přímo z DB).
+    """
+    return _project_tasks(project_id, topic_version(('project', project_id)))
+def _peek_task(task_id):
+    """
+    Poslední známý řádek úkolu (snapshot bez vynucení reloadu, jinak DB) – pro témata invalidací.
+    """
+    snap = _snapshot_holder()['snapshot']
+    row = snap['tasks'].get(task_id) if snap else None
+    return row or get_task(task_id)
 def add_task(project_id, workplace_id, hours, mode, start_ddmmyyyy=None, notes='', bodies_count=1, is_active=True, parent_id=None):
     start_yyyymmdd = ddmmyyyy_to_yyyymmdd(start_ddmmyyyy) if start_ddmmyyyy else None
     data = {
@@ -367,18 +862,131 @@ def add_task(project_id, workplace_id, hours, mode, start_ddmmyyyy=None, notes='
         supabase.table('task_dependencies').insert({'task_id': task_id, 'parent_id': parent_id}).execute()
     if start_yyyymmdd:
         recalculate_from_task(task_id)
+    # Až po vložení závislosti – snapshot nesmí zachytit úkol bez parenta
+    publish(*task_topics({**response.data[0], 'start_date': start_yyyymmdd}))
     return task_id
+# Zápisy úkolů beze změny hodnoty se přeskočí (žádný UPDATE ani řádek change_log) – počítadlo za proces
+@st.cache_resource(show_spinner=False)
+def _write_stats_state():
+    return {'written': 0, 'skipped': 0, 'lock': threading.Lock()}
+def _count_task_writes(written=0, skipped=0):
+    state = _write_stats_state()
+    with state['lock']:
+        state['written'] += written
+        state['skipped'] += skipped
+def get_write_stats():
+    """
+    {'written', 'skipped'} – zapsané a přeskočené (beze změny) řádky tasks od startu procesu.
+    """
+    state = _write_stats_state()
+    return {'written': state['written'], 'skipped': state['skipped']}
+NUMERIC_TASK_FIELDS = ('hours', 'bodies_count')
+def _same_value(field, current, new):
+    """
+    Hodnota v DB a nová hodnota jsou stejné. Numericky jen u číselných sloupců (8 == '8' == 8.0),
+    jinak přesná shoda – text '01' a '1' se liší.
+    """
+    if current == new:
+        return True
+    if current is None or new is None or isinstance(current, bool) or isinstance(new, bool):
+        return False
+    if field in NUMERIC_TASK_FIELDS or (isinstance(current, (int, float)) and isinstance(new, (int, float))):
+        try:
+            return float(current) == float(new)
+        except (TypeError, ValueError):
+            return False
+    return False
+def _changed_fields(tasks_by_id, changes):
+    """
+    Jen pole, jejichž hodnota se proti tasks_by_id opravdu mění; úkoly beze změny vypadnou.
+    """
+    result = {}
+    for tid, fields in changes.items():
+        diff = {f: v for f, v in fields.items() if not _same_value(f, tasks_by_id[tid].get(f), v)}
+        if diff:
+            result[tid] = diff
+    return result
 def update_task(task_id, field, value, is_internal=False):
+    """
+    Zapíše jedno pole úkolu. Je-li hodnota stejná jako v DB, nezapisuje nic (ani change_log).
+    Vrátí True, pokud se zapisovalo.
+    """
     if field in ('start_date', 'end_date') and value and not is_internal:
         value = ddmmyyyy_to_yyyymmdd(value)
+    before = _peek_task(task_id)
+    if before and _same_value(field, before.get(field), value):
+        # snapshot může být starý – shodu ověřit proti DB
+        before = get_task(task_id)
+        if before and _same_value(field, before.get(field), value):
+            _count_task_writes(skipped=1)
+            return False
     supabase.table('tasks').update({field: value}).eq('id', task_id).execute()
-    now = datetime.now().isoformat()
-    supabase.table('change_log').insert({
+    publish(*task_topics(before, before and {**before, field: value}))
+    if field in ('start_date', 'end_date', 'status', 'workplace_id'):
+        _interval_index().update_fields(task_id, {field: value})
+    _log_change([{
         'task_id': task_id,
-        'change_time': now,
+        'change_time': datetime.now().isoformat(),
         'description': f'Updated {field} to {value}',
         'changed_by': st.session_state.get('username', 'system')
-    }).execute()
+    }])
+    _count_task_writes(written=1)
+    return True
+# Stránkovaný prohlížeč úkolů – řazení, filtry i stránka se řeší v DB
+TASK_SORT_COLUMNS = {
+    'ID': 'id',
+    'Začátek': 'start_date',
+    'Konec': 'end_date',
+    'Hodiny': 'hours',
+    'Pracoviště': 'workplace_id',
+    'Stav': 'status',
+}
+def fetch_task_page(project_id, page=1, page_size=50, sort_by='id', descending=False,
+                    workplace_id=None, status=None, search=None):
+    """
+    Jedna stránka úkolů projektu (range + count='exact'), doba nezávisí na velikosti projektu.
+    status: 'done' / 'canceled' / 'open' (= ani hotové, ani zrušené), search: podřetězec poznámky.
+    Vrátí (řádky stránky, počet všech odpovídajících úkolů).
+    """
+    query = supabase.table('tasks').select('*', count='exact').eq('project_id', project_id)
+    if workplace_id is not None:
+        query = query.eq('workplace_id', workplace_id)
+    if status == 'open':
+        query = query.not_.in_('status', ['done', 'canceled'])
+    elif status:
+        query = query.eq('status', status)
+    if search:
+        query = query.ilike('notes', f'%{search}%')
+    query = query.order(sort_by, desc=descending)
+    if sort_by != 'id':
+        query = query.order('id')  # stabilní pořadí mezi stránkami
+    offset = (page - 1) * page_size
+    response = query.range(offset, offset + page_size - 1).execute()
+    return response.data, response.count or 0
+def task_page_context(rows):
+    """
+    Odvozené sloupce jen pro řádky stránky.
+    Vrátí ({task_id: řádek parenta}, {task_id: [projekty kolidujících úkolů]}) – 2 dotazy + intervalový index.
+    """
+    ids = [row['id'] for row in rows]
+    parents, collisions = {}, {}
+    if ids:
+        deps = supabase.table('task_dependencies').select('task_id, parent_id').in_('task_id', ids).execute().data
+        parent_ids = list({dep['parent_id'] for dep in deps})
+        parent_rows = {}
+        if parent_ids:
+            parent_rows = {p['id']: p for p in supabase.table('tasks')
+                           .select('id, workplace_id, start_date, notes')
+                           .in_('id', parent_ids).execute().data}
+        parents = {dep['task_id']: parent_rows.get(dep['parent_id']) for dep in deps}
+    for row in rows:
+        if not is_scheduled(row):
+            continue
+        others = find_overlapping_tasks(row['workplace_id'], row['start_date'], row['end_date'],
+                                        exclude_task=row['id'])
+        if others:
+            collisions[row['id']] = sorted({o['project_id'] for o in others}, key=str)
+    return parents, collisions
 def get_task(task_id):
     response = supabase.table('tasks').select('*').eq('id', task_id).execute()
     return response.data[0] if response.data else None
@@ -397,126 +1005,290 @@ def has_cycle(task_id):
         visited.add(current)
         current = get_parent(current)
     return False
+def _load_recalc_scope(project_id):
+    """
+    Načte úkoly projektu a jejich závislosti (2–3 dotazy) pro přepočet v paměti.
+    Vrátí (tasks_by_id, children_of, parent_of).
+    """
+    tasks_by_id = {t['id']: t for t in get_tasks(project_id)}
+    children_of, parent_of = {}, {}
+    if not tasks_by_id:
+        return tasks_by_id, children_of, parent_of
+    ids = ','.join(str(tid) for tid in tasks_by_id)
+    deps = fetch_all(
+        lambda: supabase.table('task_dependencies')
+        .select('task_id, parent_id')
+        .or_(f"task_id.in.({ids}),parent_id.in.({ids})"),
+        key=None, order_by=('task_id', 'parent_id')
+    )
+    for dep in deps:
+        children_of.setdefault(dep['parent_id'], []).append(dep['task_id'])
+        parent_of.setdefault(dep['task_id'], dep['parent_id'])
+    # Děti mimo projekt (neobvyklé) dotáhneme jedním dotazem
+    missing = {dep['task_id'] for dep in deps if dep['task_id'] not in tasks_by_id}
+    if missing:
+        extra = fetch_all(lambda: supabase.table('tasks').select('*').in_('id', list(missing)))
+        tasks_by_id.update({t['id']: t for t in extra})
+    return tasks_by_id, children_of, parent_of
+RECALC_WRITE_WORKERS = 8  # souběžné UPDATE dotazy při zápisu přepočtu
+def _update_task_fields(changes):
+    """
+    UPDATE jen změněných polí {task_id: {pole: hodnota}} – ostatní sloupce (poznámka, hodiny, stav
+    upravené mezitím jinou session) zůstanou netknuté. Úkoly se stejnou změnou jdou jedním dotazem
+    (.in_), skupiny souběžně.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    groups = {}
+    for tid, fields in changes.items():
+        groups.setdefault(tuple(sorted(fields.items())), []).append(tid)
+    client = get_supabase_client()  # z vlákna skriptu – pracovní vlákna nemají Streamlit kontext
+    def run(group):
+        fields, ids = group
+        client.table('tasks').update(dict(fields)).in_('id', ids).execute()
+    with ThreadPoolExecutor(max_workers=min(RECALC_WRITE_WORKERS, len(groups))) as pool:
+        list(pool.map(run, groups.items()))
+def _apply_recalculation(tasks_by_id, changes, considered=0):
+    """
+    Zapíše změněná pole (_update_task_fields), řádky change_log jdou do auditní fronty.
+    Pole se stejnou hodnotou jako v tasks_by_id se vynechají; considered = počet řádků,
+    které přepočet prošel – co z nich se nezapsalo, počítá se jako přeskočené.
+    Vrátí (zapsané řádky, přeskočené řádky).
+    """
+    requested = max(considered, len(changes))
+    changes = _changed_fields(tasks_by_id, changes)
+    _count_task_writes(len(changes), requested - len(changes))
+    if not changes:
+        return 0, requested
+    _update_task_fields(changes)
+    rows = [{**tasks_by_id[tid], **fields} for tid, fields in changes.items()]
+    publish(*task_topics(*(tasks_by_id[tid] for tid in changes), *rows))
+    now = datetime.now().isoformat()
+    changed_by = st.session_state.get('username', 'system')
+    _log_change([
+        {
+            'task_id': tid,
+            'change_time': now,
+            'description': f'Updated {field} to {value}',
+            'changed_by': changed_by
+        }
+        for tid, fields in changes.items()
+        for field, value in fields.items()
+    ])
+    index = _interval_index()
+    for tid, fields in changes.items():
+        tasks_by_id[tid].update(fields)
+        index.upsert(tasks_by_id[tid])
+    return len(changes), requested - len(changes)
+def commit_task_edits(project_id, edits, username):
+    """
+    Dávkový commit úprav z gridu: edits = {task_id: {'notes': str, 'start_date': 'YYYY-MM-DD' | None}}.
+    Validace proti čerstvému stavu projektu (dítě jen po hotovém / zrušeném parentu, bez kolize
+    v projektu), pak zápis úprav i přepočtených termínů (jen změněná pole), change_log / logs přes auditní frontu
+    a jeden přepočet přes všechny dotčené větve.
+    Vrátí (seznam uložených task_id, chyby, varování).
+    """
+    tasks_by_id, children_of, parent_of = _load_recalc_scope(project_id)
+    changes, moved, log_entries, errors, warnings = {}, [], [], [], []
+    for task_id, fields in edits.items():
+        task = tasks_by_id.get(task_id)
+        if task is None:
+            errors.append(f"Úkol {task_id} už neexistuje.")
+            continue
+        accepted = {}
+        original_notes = task.get('notes') or ''
+        if 'notes' in fields and fields['notes'] != original_notes:
+            accepted['notes'] = fields['notes']
+            log_entries.append(('notes', (username, 'update_notes', task_id,
+                                f"Změna poznámky z '{original_notes}' na '{fields['notes']}'")))
+        new_start = fields.get('start_date')
+        if 'start_date' in fields and new_start != task['start_date']:
+            parent = tasks_by_id.get(parent_of.get(task_id))
+            if parent and parent['status'] not in ('done', 'canceled'):
+                errors.append(f"Nelze změnit datum u dětského úkolu {task_id}, protože parent není hotový nebo zrušený.")
+            elif new_start and find_overlapping_tasks(
+                    task['workplace_id'], new_start,
+                    calculate_end_date(new_start, task['hours'], task['capacity_mode']),
+                    project_id=task['project_id'], exclude_task=task_id):
+                errors.append(f"Kolize v rámci projektu u úkolu {task_id} na tomto pracovišti. Upravte datum a zkuste znovu.")
+            else:
+                if new_start:
+                    others = {
+                        f"P{ex['project_id']}" for ex in find_overlapping_tasks(
+                            task['workplace_id'], new_start,
+                            calculate_end_date(new_start, task['hours'], task['capacity_mode']),
+                            exclude_project=task['project_id'])
+                    }
+                    if others:
+                        warnings.append(f"Úkol {task_id}: po změně dojde ke kolizi s jinými projekty na stejném pracovišti: {', '.join(sorted(others))}.")
+                accepted['start_date'] = new_start
+                if parent:
+                    accepted['custom_start'] = True
+                moved.append(task_id)
+                old_disp = yyyymmdd_to_ddmmyyyy(task['start_date']) if task['start_date'] else ''
+                new_disp = yyyymmdd_to_ddmmyyyy(new_start) if new_start else ''
+                log_entries.append(('start_date', (username, 'update_start_date', task_id,
+                                    f"Změna data zahájení z '{old_disp}' na '{new_disp}'" if new_start
+                                    else "Datum zahájení vymazáno")))
+        if accepted:
+            changes[task_id] = accepted
+    if not changes:
+        return [], errors, warnings
+    # Přepočet nad stavem po úpravách – jeden průchod přes všechny dotčené větve
+    edited = {**tasks_by_id, **{tid: {**tasks_by_id[tid], **f} for tid, f in changes.items()}}
+    plan = plan_recalculation(edited, children_of, moved, calculate_end_date, get_next_working_day_after)
+    for tid, fields in plan.items():
+        changes.setdefault(tid, {}).update(fields)
+    # Logovat a hlásit jako uložené jen pole, která se opravdu zapíšou
+    changes = _changed_fields(tasks_by_id, changes)
+    _apply_recalculation(tasks_by_id, changes)
+    log_actions([entry for field, entry in log_entries if field in changes.get(entry[2], {})])
+    return list(edits.keys() & changes.keys()), errors, warnings
 def recalculate_from_task(task_id):
+    """
+    Přepočet termínů podstromu od úkolu. Vrátí (zapsané řádky, přeskočené beze změny).
+    """
     task = get_task(task_id)
     if not task:
-        return
-    if task['status'] == 'canceled':
-        update_task(task_id, 'end_date', None, is_internal=True)
-        child_start = None
-    else:
-        if task['start_date']:
-            end_date = calculate_end_date(task['start_date'], task['hours'], task['capacity_mode'])
-            update_task(task_id, 'end_date', end_date, is_internal=True)
-            child_start = get_next_working_day_after(end_date, task['capacity_mode'])
-        else:
-            update_task(task_id, 'end_date', None, is_internal=True)
-            child_start = None
-    children = get_children(task_id)
-    for child_id in children:
-        child = get_task(child_id)
-        if not child or child['status'] == 'canceled':
-            continue
-        parent_status = task['status']  # Status parenta
-        if parent_status in ['done', 'canceled'] and child.get('custom_start', False):
-            # Nepřepisovat start, jen rekalkulovat od child dál
-            recalculate_from_task(child_id)
-        else:
-            update_task(child_id, 'start_date', child_start, is_internal=True)
-            recalculate_from_task(child_id)
+        return 0, 0
+    tasks_by_id, children_of, _ = _load_recalc_scope(task['project_id'])
+    tasks_by_id.setdefault(task_id, task)
+    changes = plan_recalculation(tasks_by_id, children_of, [task_id],
+                                 calculate_end_date, get_next_working_day_after)
+    return _apply_recalculation(tasks_by_id, changes, len(reachable(tasks_by_id, children_of, [task_id])))
 def recalculate_project(project_id):
-    tasks = get_tasks(project_id)
-    root_ids = [t['id'] for t in tasks if not get_parent(t['id'])]
-    incompletes = [rid for rid in root_ids if not get_task(rid)['start_date']]
+    """
+    Přepočet celého projektu od root úkolů. Vrátí (zapsané, přeskočené) nebo None, chybí-li start rootu.
+    """
+    tasks_by_id, children_of, parent_of = _load_recalc_scope(project_id)
+    root_ids = [tid for tid, t in tasks_by_id.items()
+                if t['project_id'] == project_id and tid not in parent_of]
+    incompletes = [rid for rid in root_ids if not tasks_by_id[rid]['start_date']]
     if incompletes:
         st.error(f"Chybí datum zahájení u root úkolů: {', '.join(map(str, incompletes))}")
-        return
-    for root_id in root_ids:
-        recalculate_from_task(root_id)
-def get_colliding_projects_simulated(workplace_id, start_date, end_date):
+        return None
+    changes = plan_recalculation(tasks_by_id, children_of, root_ids,
+                                 calculate_end_date, get_next_working_day_after)
+    return _apply_recalculation(tasks_by_id, changes, len(reachable(tasks_by_id, children_of, root_ids)))
+# Intervalový index naplánovaných úkolů – sdílený v procesu, aktualizovaný na místě
+INTERVAL_INDEX_TTL = 600  # sekundy – pojistka proti změnám mimo aplikaci
+@st.cache_resource(ttl=INTERVAL_INDEX_TTL, show_spinner=False)
+def _interval_index():
+    return IntervalIndexRegistry(snapshot_tasks_in_range())
+def find_overlapping_tasks(workplace_id, start_date, end_date, project_id=None, exclude_project=None, exclude_task=None):
+    """
+    Úkoly na pracovišti, které se překrývají s [start_date, end_date] (YYYY-MM-DD).
+    project_id = jen úkoly daného projektu, exclude_project / exclude_task = vynechat.
+    """
+    return _interval_index().overlapping(
+        workplace_id, start_date, end_date,
+        project_id=project_id, exclude_project=exclude_project, exclude_task=exclude_task
+    )
+def get_colliding_projects_simulated(workplace_id, start_date, end_date, exclude_task=None):
     if not start_date or not end_date:
         return []
     try:
-        new_start = datetime.strptime(start_date, '%Y-%m-%d').date()
-        new_end = datetime.strptime(end_date, '%Y-%m-%d').date()
-    except Exception:
-        return []
-    response = (
-        supabase.table('tasks')
-        .select('project_id, start_date, end_date')
-        .eq('workplace_id', workplace_id)
-        .not_.is_('start_date', 'null')
-        .not_.is_('end_date', 'null')
-        .execute()
-    )
-    colliding = []
-    for row in response.data:
-        try:
-            row_start = datetime.strptime(row['start_date'], '%Y-%m-%d').date()
-            row_end = datetime.strptime(row['end_date'], '%Y-%m-%d').date()
-            if not (new_end < row_start or new_start > row_end):
-                colliding.append(row['project_id'])
-        except Exception:
-            continue
-    return list(set(colliding))
-def get_colliding_projects(task_id):
-    task = get_task(task_id)
-    if not task or not task.get('start_date') or not task.get('end_date'):
+        rows = find_overlapping_tasks(workplace_id, start_date, end_date, exclude_task=exclude_task)
+    except ValueError:
         return []
-    wp = task['workplace_id']
-    start = datetime.strptime(task['start_date'], '%Y-%m-%d').date()
-    end = datetime.strptime(task['end_date'], '%Y-%m-%d').date()
-    response = (
-        supabase.table('tasks')
-        .select('project_id, start_date, end_date')
-        .eq('workplace_id', wp)
-        .neq('id', task_id)
-        .not_.is_('start_date', 'null')
-        .not_.is_('end_date', 'null')
-        .execute()
-    )
-    colliding = []
-    for row in response.data:
-        try:
-            row_start = datetime.strptime(row['start_date'], '%Y-%m-%d').date()
-            row_end = datetime.strptime(row['end_date'], '%Y-%m-%d').date()
-            if not (end < row_start or start > row_end):
-                colliding.append(row['project_id'])
-        except Exception:
-            continue
-    return list(set(colliding))
-def check_collisions(task_id):
-    return len(get_colliding_projects(task_id)) > 0
-def mark_all_collisions():
-    response = supabase.table('tasks').select('id').not_.is_('start_date', 'null').not_.is_('end_date', 'null').execute()
-    ids = [row['id'] for row in response.data]
-    return {tid: check_collisions(tid) for tid in ids}
+    return list({row['project_id'] for row in rows})
+@st.cache_resource(ttl=SNAPSHOT_MAX_AGE, max_entries=32, show_spinner=False)
+def _window_collisions(date_from, date_to, version):
+    # Sdílené mezi sessions – NEMODIFIKOVAT
+    rows = snapshot_tasks_in_range(date_from, date_to)
+    if rows:
+        # Úkol přesahující okno může kolidovat i mimo něj – načíst celý rozsah úkolů okna
+        first = min(t['start_date'] for t in rows)
+        last = max(t['end_date'] for t in rows)
+        if (date_from is None or first < date_from) or (date_to is None or last > date_to):
+            rows = snapshot_tasks_in_range(first, last)
+    collisions = compute_collisions(rows)
+    return {'tasks': {t['id']: t for t in rows}, 'collisions': dict(collisions)}
+def load_collision_snapshot(date_from=None, date_to=None):
+    """
+    Naplánované, nezrušené úkoly (volitelně jen v okně) a jejich kolize (sweep-line) – jeden
+    dotaz / průchod snapshotem pro všechna pracoviště, cache podle okna a verze dat.
+    Snapshot se předává do get_colliding_projects / check_collisions / mark_all_collisions.
+    Kolize úkolů okna jsou úplné (rozsah se rozšíří na celé trvání úkolů okna); 'tasks' obsahuje
+    i kolidující úkoly mimo okno.
+    """
+    return _window_collisions(_iso_date(date_from), _iso_date(date_to), get_data_version())
+def get_colliding_projects(task_id, snapshot=None):
+    snapshot = snapshot or load_collision_snapshot()
+    return colliding_projects(snapshot['collisions'], snapshot['tasks'], task_id)
+def check_collisions(task_id, snapshot=None):
+    snapshot = snapshot or load_collision_snapshot()
+    return bool(snapshot['collisions'].get(task_id))
+def mark_all_collisions(snapshot=None):
+    snapshot = snapshot or load_collision_snapshot()
+    return {tid: bool(snapshot['collisions'].get(tid)) for tid in snapshot['tasks']}
 def delete_task(task_id):
     try:
+        before = _peek_task(task_id)
+        flush_audit()
         supabase.table('change_log').delete().eq('task_id', task_id).execute()
         supabase.table('task_dependencies').delete().eq('task_id', task_id).execute()
         supabase.table('task_dependencies').delete().eq('parent_id', task_id).execute()
         supabase.table('tasks').delete().eq('id', task_id).execute()
+        _interval_index().remove(task_id)
+        publish(*task_topics(before))
         return True
     except Exception as e:
         st.error(f"Chyba při mazání úkolu: {str(e)}")
         return False
 def delete_project(project_id):
+    task_rows = []
     try:
-        tasks_response = supabase.table('tasks').select('id').eq('project_id', project_id).execute()
-        for task in tasks_response.data:
+        task_rows = fetch_all(lambda: supabase.table('tasks')
+                              .select('id, project_id, workplace_id, start_date, end_date')
+                              .eq('project_id', project_id))
+        flush_audit()
+        for task in task_rows:
             supabase.table('change_log').delete().eq('task_id', task['id']).execute()
             supabase.table('task_dependencies').delete().eq('task_id', task['id']).execute()
             supabase.table('task_dependencies').delete().eq('parent_id', task['id']).execute()
             supabase.table('tasks').delete().eq('id', task['id']).execute()
+            _interval_index().remove(task['id'])
         supabase.table('projects').delete().eq('id', project_id).execute()
         return True
     except Exception as e:
         st.error(f"Chyba při mazání projektu {project_id}: {str(e)}")
         return False
+    finally:
+        # I při částečném selhání mohly zmizet úkoly/projekt – cache zahodit vždy
+        publish('projects', ('project', project_id), *task_topics(*task_rows))
 # ============================
 # USER MANAGEMENT FUNKCE – vše přes Supabase
 # ============================
+# Záznamy uživatelů – TTL cache; verze uživatelů se zvýší při každé změně (přidání, smazání, role)
+# v tomto procesu a session se při příštím běhu ověří znovu. Změny z jiného procesu se projeví
+# nejpozději po USER_CACHE_TTL (session se přes get_user_record ověřuje aspoň jednou za TTL).
+USER_CACHE_TTL = 300  # sekundy
+@st.cache_resource(show_spinner=False)
+def _users_version_state():
+    return {'version': 0, 'lock': threading.Lock()}
+def get_users_version():
+    return _users_version_state()['version']
+@st.cache_data(ttl=USER_CACHE_TTL, show_spinner=False)
+def get_user_record(username):
+    """
+    {'username', 'name', 'role'} nebo None – z cache, DB se ptá nejvýš jednou za TTL / změnu.
+    """
+    response = supabase.table('app_users').select('username, name, role').eq('username', username).execute()
+    return response.data[0] if response.data else None
+def invalidate_user_cache():
+    get_user_record.clear()
+    state = _users_version_state()
+    with state['lock']:
+        state['version'] += 1
+def set_user_role(username, role):
+    try:
+        response = supabase.table('app_users').update({'role': role}).eq('username', username).execute()
+        if response.data:
+            invalidate_user_cache()
+            return True, f"Role uživatele '{username}' změněna na '{role}'."
+        return False, "Uživatel nenalezen."
+    except Exception as e:
+        return False, f"Chyba při změně role: {str(e)}"
 def delete_user(username: str):
     """
     Smaže uživatele z tabulky app_users podle username.
@@ -538,8 +1310,7 @@ def delete_user(username: str):
                    .eq("username", username)\
                    .execute()
         if response.data:
-            # Vyčisti cache (pokud máš cachovanou funkci)
-            # load_users_from_db.clear()  # ← odkomentuj jen pokud máš @st.cache_data
+            invalidate_user_cache()
             return True, f"Uživatel '{username}' byl úspěšně smazán."
         else:
             return False, "Smazání selhalo (žádný řádek nebyl ovlivněn)."
@@ -570,6 +1341,7 @@ def add_user(username, name, password, role, email=""):
     try:
         response = supabase.table('app_users').insert(data).execute()
         if response.data:
+            invalidate_user_cache()
             return True, "Uživatel úspěšně přidán do databáze."
         else:
             return False, "Nepodařilo se vložit uživatele."
@@ -614,21 +1386,14 @@ def render_sidebar(current_page):
     Vykreslí sidebar s uvítáním, logoutem a klikatelnou navigací.
     Funguje s auth_simple.py (cookies + Supabase).
     """
-    # Načtení role z DB, pokud chybí nebo je viewer
+    # Role je v session (z podepsaného tokenu, viz check_login); DB jen výjimečně přes cache
     role = st.session_state.get('role')
     username = st.session_state.get('username')
-   
-    if username and (role is None or role == 'viewer'):
+    if username and role is None:
         try:
-            response = supabase.table('app_users')\
-                       .select('role')\
-                       .eq('username', username)\
-                       .execute()
-            if response.data:
-                role = response.data[0]['role']
-                st.session_state['role'] = role
-            else:
-                role = 'viewer'
+            user = get_user_record(username)
+            role = user['role'] if user else 'viewer'
+            st.session_state['role'] = role
         except Exception as e:
             print(f"Chyba při načítání role: {e}")
             role = 'viewer'
@@ -646,6 +1411,7 @@ def render_sidebar(current_page):
         "Prohlížet / Upravovat úkoly",
         "HMG měsíční",
         "HMG roční",
+        "Gantt – dlouhý horizont",
         "Správa pracovišť",
         "Změnit heslo"
     ]
@@ -658,6 +1424,7 @@ def render_sidebar(current_page):
         "Prohlížet / Upravovat úkoly": "pages/3_task_man.py",
         "HMG měsíční": "pages/4_HMG_month.py",
         "HMG roční": "pages/5_HMG_year.py",
+        "Gantt – dlouhý horizont": "pages/9_gantt.py",
         "Správa pracovišť": "pages/6_WP_man.py",
         "Změnit heslo": "pages/7_pass_man.py",
         "User Management": "pages/8_user_man.py"
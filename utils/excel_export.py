@@ -0,0 +1,98 @@
+# utils/excel_export.py
+"""
+Streamovaný export do Excelu – openpyxl ve write-only režimu.
+Řádky se do listů zapisují průběžně z generátorů (např. iter_rows nad DB),
+v paměti se nedrží DataFrame ani celé listy, jen hotový soubor.
+"""
+import re
+from datetime import date
+from io import BytesIO
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+MAX_SHEET_NAME = 31
+_INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+TASK_COLUMNS = ['Úkol ID', 'Projekt', 'Pracoviště', 'Hodiny', 'Režim', 'Start', 'Konec',
+                'Status', 'Počet těles', 'Aktivní', 'Poznámka']
+CHANGE_LOG_COLUMNS = ['Čas změny', 'Úkol ID', 'Popis', 'Změnil']
+
+
+def sheet_title(name, used):
+    """
+    Platný a unikátní název listu (max. 31 znaků, bez []:*?/\\).
+    """
+    base = _INVALID_SHEET_CHARS.sub('_', str(name)).strip() or 'List'
+    base = base[:MAX_SHEET_NAME]
+    title, n = base, 1
+    while title.lower() in used:
+        n += 1
+        suffix = f" ({n})"
+        title = base[:MAX_SHEET_NAME - len(suffix)] + suffix
+    used.add(title.lower())
+    return title
+
+
+def _parse_date(value):
+    return date.fromisoformat(value[:10]) if value else None
+
+
+def task_row(task, wp_name_fn):
+    return [
+        task['id'],
+        task['project_id'],
+        wp_name_fn(task['workplace_id']),
+        task.get('hours'),
+        task.get('capacity_mode'),
+        _parse_date(task.get('start_date')),
+        _parse_date(task.get('end_date')),
+        task.get('status'),
+        task.get('bodies_count'),
+        task.get('is_active'),
+        task.get('notes') or '',
+    ]
+
+
+def change_log_row(entry):
+    return [
+        entry.get('change_time'),
+        entry.get('task_id'),
+        entry.get('description'),
+        entry.get('changed_by'),
+    ]
+
+
+def write_workbook(sheets):
+    """
+    sheets: iterovatelné (název listu, hlavička, iterovatelné řádky).
+    Listy i řádky se zpracují líně – stačí generátory. Vrátí bytes .xlsx.
+    """
+    wb = Workbook(write_only=True)
+    used = set()
+    bold = Font(bold=True)
+    date_format = 'DD.MM.YYYY'
+    for name, header, rows in sheets:
+        ws = wb.create_sheet(sheet_title(name, used))
+        ws.freeze_panes = 'A2'
+        header_cells = []
+        for label in header:
+            cell = WriteOnlyCell(ws, value=label)
+            cell.font = bold
+            header_cells.append(cell)
+        ws.append(header_cells)
+        for row in rows:
+            ws.append([_date_cell(ws, v, date_format) if isinstance(v, date) else v for v in row])
+    if not used:
+        wb.create_sheet('Prázdné')
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def _date_cell(ws, value, number_format):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.number_format = number_format
+    return cell
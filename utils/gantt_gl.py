@@ -0,0 +1,170 @@
+# utils/gantt_gl.py
+"""
+Gantt pro dlouhý horizont (kvartál, rok, celý řetězec projektu) ve WebGL.
+Pruhy úkolů se nekreslí jako SVG bary, ale jako úsečky v jednom Scattergl tracu
+na barvu (segmenty oddělené None). Dráhy se počítají na serveru (utils.gantt).
+Při velkém rozsahu se úkoly pracoviště slučují do souvislých bloků obsazenosti
+(level of detail) – počet kreslených segmentů pak nezávisí na počtu úkolů.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+import plotly.graph_objects as go
+
+from utils.collisions import compute_collisions
+from utils.gantt import build_layout
+from utils.hmg_figure import calendar_overlays
+
+COLLISION_COLOR = '#EA4335'
+DEFAULT_COLOR = '#4285F4'
+BLOCK_COLOR = '#455A64'
+DETAIL_MAX_DAYS = 92      # do ~kvartálu jednotlivé úkoly, nad tím souhrnné bloky
+SHADING_MAX_DAYS = 62     # stínování víkendů jen pro krátký rozsah
+ROW_HEIGHT_PX = 22
+
+
+def use_detail(date_from, date_to):
+    return (date_to - date_from).days + 1 <= DETAIL_MAX_DAYS
+
+
+def lod_bucket_days(date_from, date_to):
+    """
+    Tolerance mezery při slučování bloků – roste s délkou rozsahu.
+    """
+    days = (date_to - date_from).days + 1
+    if days <= 180:
+        return 1
+    if days <= 400:
+        return 3
+    return 7
+
+
+def _clip(task, date_from, date_to):
+    start = max(date.fromisoformat(task['start_date']), date_from)
+    end = min(date.fromisoformat(task['end_date']), date_to)
+    return start, end + timedelta(days=1)  # konec pruhu = začátek dalšího dne
+
+
+def detail_segments(tasks, projects, wp_name_fn, date_from, date_to):
+    """
+    Jednotlivé úkoly v drahách. Vrátí (řádky [(pracoviště, dráha, popisek)], {barva: segmenty}).
+    Segment = (řádek, začátek, konec, hover text).
+    """
+    layout = build_layout(tasks, wp_name_fn)
+    row_of = {(wp, lane): i for i, (wp, lane, _) in enumerate(layout['rows'])}
+    collisions = compute_collisions(tasks)
+    by_color = defaultdict(list)
+    for wp, wp_tasks in layout['tasks_by_wp'].items():
+        for t in wp_tasks:
+            proj = projects.get(t['project_id'], {'name': f"P{t['project_id']}", 'color': DEFAULT_COLOR})
+            colliding = bool(collisions.get(t['id']))
+            start, end = _clip(t, date_from, date_to)
+            hover = (
+                f"<b>{proj['name']}</b> (úkol {t['id']})<br>"
+                f"{wp}<br>"
+                f"Od: {date.fromisoformat(t['start_date']):%d.%m.%Y}<br>"
+                f"Do: {date.fromisoformat(t['end_date']):%d.%m.%Y}<br>"
+                f"Hodiny: {t.get('hours')}"
+                + ("<br><b>Kolize</b>" if colliding else "")
+            )
+            color = COLLISION_COLOR if colliding else proj['color']
+            by_color[color].append((row_of[(wp, layout['lane_of'][t['id']])], start, end, hover))
+    return layout['rows'], by_color
+
+
+def block_segments(tasks, wp_name_fn, date_from, date_to, bucket_days):
+    """
+    Souhrn: jeden řádek na pracoviště, úkoly sloučené do bloků (mezera <= bucket_days se zacelí).
+    Bloky s kolizí jsou červené. Vrátí stejný tvar jako detail_segments.
+    """
+    collisions = compute_collisions(tasks)
+    by_wp = defaultdict(list)
+    for t in tasks:
+        start, end = _clip(t, date_from, date_to)
+        by_wp[wp_name_fn(t['workplace_id'])].append((start, end, t))
+    rows = []
+    by_color = defaultdict(list)
+    gap = timedelta(days=bucket_days)
+    for row, wp in enumerate(sorted(by_wp)):
+        rows.append((wp, 0, wp))
+        spans = sorted(by_wp[wp], key=lambda s: s[0])
+        block = None
+        for start, end, t in spans + [(None, None, None)]:
+            if block and start is not None and start <= block['end'] + gap:
+                block['end'] = max(block['end'], end)
+                block['count'] += 1
+                block['hours'] += t.get('hours') or 0
+                block['collision'] |= bool(collisions.get(t['id']))
+                continue
+            if block:
+                hover = (
+                    f"<b>{wp}</b><br>"
+                    f"{block['start']:%d.%m.%Y} – {block['end'] - timedelta(days=1):%d.%m.%Y}<br>"
+                    f"Úkolů: {block['count']}, hodin: {block['hours']:.1f}"
+                    + ("<br><b>Obsahuje kolize</b>" if block['collision'] else "")
+                )
+                color = COLLISION_COLOR if block['collision'] else BLOCK_COLOR
+                by_color[color].append((row, block['start'], block['end'], hover))
+            if start is not None:
+                block = {'start': start, 'end': end, 'count': 1, 'hours': t.get('hours') or 0,
+                         'collision': bool(collisions.get(t['id']))}
+    return rows, by_color
+
+
+def _trace(color, segments, line_width):
+    """
+    Jeden Scattergl trace pro všechny segmenty barvy: začátek, střed (kvůli hoveru), konec, None.
+    """
+    xs, ys, texts = [], [], []
+    for row, start, end, hover in segments:
+        mid = start + (end - start) / 2
+        xs += [start, mid, end, None]
+        ys += [row, row, row, None]
+        texts += [hover, hover, hover, None]
+    return go.Scattergl(
+        x=xs, y=ys, mode='lines', line=dict(color=color, width=line_width),
+        hovertext=texts, hoverinfo='text', showlegend=False, connectgaps=False
+    )
+
+
+def build_gantt_figure(tasks, projects, wp_name_fn, date_from, date_to, detail=None, title=None):
+    """
+    WebGL Gantt pro [date_from, date_to]. detail=None → podle délky rozsahu (use_detail).
+    Vrátí go.Figure, nebo None bez úkolů.
+    """
+    if not tasks:
+        return None
+    if detail is None:
+        detail = use_detail(date_from, date_to)
+    if detail:
+        rows, by_color = detail_segments(tasks, projects, wp_name_fn, date_from, date_to)
+    else:
+        rows, by_color = block_segments(tasks, wp_name_fn, date_from, date_to,
+                                        lod_bucket_days(date_from, date_to))
+    line_width = max(2, min(18, int(ROW_HEIGHT_PX * 0.7)))
+    fig = go.Figure([_trace(color, segments, line_width) for color, segments in by_color.items()])
+    shapes, annotations = [], []
+    if (date_to - date_from).days + 1 <= SHADING_MAX_DAYS:
+        shapes, annotations = calendar_overlays(date_from, date_to)
+    today = date.today()
+    if date_from <= today <= date_to:
+        shapes.append(dict(type='line', xref='x', yref='paper', x0=today, x1=today, y0=0, y1=1,
+                           line=dict(color='black', width=1)))
+    fig.update_layout(
+        title=title,
+        height=150 + len(rows) * ROW_HEIGHT_PX,
+        margin=dict(l=10, r=10, t=60, b=30),
+        shapes=shapes,
+        annotations=annotations,
+        dragmode='pan',
+        hovermode='closest',
+    )
+    fig.update_xaxes(type='date', range=[date_from, date_to + timedelta(days=1)])
+    fig.update_yaxes(
+        tickmode='array',
+        tickvals=list(range(len(rows))),
+        ticktext=[label for _, _, label in rows],
+        range=[len(rows) - 0.5, -0.5],   # první řádek nahoře
+        fixedrange=True,
+    )
+    return fig
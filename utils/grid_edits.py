@@ -0,0 +1,28 @@
+# utils/grid_edits.py
+"""
+Rozdíl mezi načtenými úkoly a daty vrácenými z AgGrid – vektorově přes pandas,
+bez dotazu do DB na řádek. Výsledek je dávka neuložených změn {task_id: {sloupec: hodnota}}.
+"""
+import pandas as pd
+
+
+def _normalized(df, columns, key):
+    frame = df.set_index(key)[columns]
+    return frame.apply(lambda col: col.where(col.notna(), '').astype(str).str.strip())
+
+
+def diff_grid(before, after, columns, key='ID'):
+    """
+    Porovná sloupce columns (hodnoty jako oříznuté řetězce, NaN = '') podle klíče key.
+    Vrátí {key: {sloupec: nová hodnota}} jen pro změněné buňky; řádky navíc / chybějící se ignorují.
+    """
+    if after is None or len(after) == 0:
+        return {}
+    old = _normalized(before, columns, key)
+    new = _normalized(pd.DataFrame(after), columns, key).reindex(old.index)
+    changed = new.ne(old) & new.notna()
+    rows = changed.any(axis=1)
+    return {
+        task_id: {col: new.at[task_id, col] for col in columns if changed.at[task_id, col]}
+        for task_id in old.index[rows]
+    }
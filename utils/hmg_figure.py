@@ -0,0 +1,155 @@
+# utils/hmg_figure.py
+"""
+Stavba Plotly grafu HMG měsíční.
+Stínování víkendů/svátků, svislé čáry i popisky se skládají do jednoho seznamu
+shapes / annotations a nastaví se jedním update_layout – add_vrect/add_vline
+po dnech kopírují celý tuple tvarů a stavba je pak kvadratická.
+Graf se dá serializovat (to_json) a cachovat podle verze dat měsíce.
+"""
+import calendar
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import plotly.express as px
+
+from utils.collisions import compute_collisions
+from utils.gantt import build_layout, lane_label
+from utils.workcal import is_holiday
+
+COLLISION_COLOR = '#EA4335'
+DEFAULT_COLOR = '#4285F4'
+EPOCH = datetime(1970, 1, 1)
+
+
+def date_to_ms(d):
+    return (datetime.combine(d, datetime.min.time()) - EPOCH).total_seconds() * 1000
+
+
+def _tooltip(proj, start_date, end_date, coll_names):
+    tooltip = (
+        f"<b>{proj['name']}</b><br>"
+        f"Projektová barva: <span style='color:{proj['color']}; font-weight:bold'>■ {proj['color']}</span><br>"
+        f"Od: {start_date.strftime('%d.%m.%Y')}<br>"
+        f"Do: {end_date.strftime('%d.%m.%Y') if end_date else 'není definován'}"
+    )
+    if coll_names:
+        tooltip += f"<br><b>Kolize s:</b> {', '.join(coll_names)}"
+    return tooltip
+
+
+def month_plot_rows(tasks, layout, projects, first_day, last_day):
+    """
+    Řádky pro px.timeline – jeden na úkol, v pořadí pracovišť a začátků.
+    """
+    tasks_by_id = {t['id']: t for t in tasks}
+    collisions = {tid: sorted(ids) for tid, ids in compute_collisions(tasks).items()}
+    plot_data = []
+    for wp, wp_tasks in layout['tasks_by_wp'].items():
+        num_lanes = layout['lane_counts'][wp]
+        for t in wp_tasks:
+            pid = t['project_id']
+            start_date = date.fromisoformat(t['start_date'])
+            end_date = date.fromisoformat(t['end_date'])
+            proj = projects.get(pid, {'name': f'P{pid}', 'color': DEFAULT_COLOR})
+            task_text = proj['name']
+            display_color = proj['color']
+            text_color = '#000000'
+            colliding = collisions.get(t['id'], [])
+            coll_names = []
+            if colliding:
+                # Vykřičník za kolizi, druhý za kolizi s jiným projektem
+                task_text += " !"
+                display_color = COLLISION_COLOR
+                text_color = '#FFFFFF'
+                for i, coll_id in enumerate(colliding):
+                    if i >= 3:
+                        coll_names.append("...a další")
+                        break
+                    coll_pid = tasks_by_id[coll_id]['project_id']
+                    coll_names.append(projects.get(coll_pid, {'name': f'P{coll_pid}'})['name'])
+                if any(tasks_by_id[cid]['project_id'] != pid for cid in colliding):
+                    task_text += " !"
+            plot_data.append({
+                "Pracoviště": lane_label(wp, layout['lane_of'][t['id']], num_lanes),
+                "Úkol": task_text,
+                "Start": max(start_date, first_day),
+                "Finish": min(end_date, last_day) + timedelta(days=1),
+                "Color": display_color,
+                "TextColor": text_color,
+                "FullTooltip": _tooltip(proj, start_date, end_date, coll_names),
+                "TaskID": t['id'],
+            })
+    return plot_data
+
+
+def calendar_overlays(first_day, last_day):
+    """
+    (shapes, annotations) pro víkendy a svátky: šedý sloupec, červená čárkovaná čára, popisek V/S.
+    """
+    shapes, annotations = [], []
+    current = first_day
+    while current <= last_day:
+        weekend = current.weekday() >= 5
+        holiday = is_holiday(current)
+        if weekend or holiday:
+            x0_ms = date_to_ms(current)
+            shapes.append(dict(
+                type='rect', xref='x', yref='paper', x0=x0_ms, x1=date_to_ms(current + timedelta(days=1)),
+                y0=0, y1=1, fillcolor='lightgray', opacity=0.3, layer='below', line_width=0
+            ))
+            shapes.append(dict(
+                type='line', xref='x', yref='paper', x0=x0_ms, x1=x0_ms, y0=0, y1=1,
+                line=dict(dash='dash', color='red', width=1.2), opacity=0.6
+            ))
+            annotations.append(dict(
+                x=x0_ms, xref='x', y=1, yref='paper', yanchor='bottom', showarrow=False,
+                text="S" if holiday else "V", font=dict(size=10, color='red')
+            ))
+        current += timedelta(days=1)
+    return shapes, annotations
+
+
+def build_month_figure(year, month, tasks, projects, wp_name_fn):
+    """
+    Graf HMG měsíční (go.Figure), nebo None, když v měsíci nic neběží.
+    tasks: naplánované nezrušené úkoly zasahující do měsíce, projects: {id: {'name', 'color'}}.
+    """
+    first_day = date(year, month, 1)
+    last_day = first_day + timedelta(days=calendar.monthrange(year, month)[1] - 1)
+    layout = build_layout(tasks, wp_name_fn)
+    plot_data = month_plot_rows(tasks, layout, projects, first_day, last_day)
+    if not plot_data:
+        return None
+    df = pd.DataFrame(plot_data)
+    fig = px.timeline(
+        df,
+        x_start="Start",
+        x_end="Finish",
+        y="Pracoviště",
+        color="Color",
+        text="Úkol",
+        hover_name=None,
+        color_discrete_map={c: c for c in df["Color"].unique()},
+        title=f"HMG HK – {calendar.month_name[month]} {year}",
+        height=400 + len(layout['rows']) * 40,
+        custom_data=["FullTooltip"]
+    )
+    fig.update_traces(
+        opacity=0.7,
+        textposition='inside',
+        textfont_color=df["TextColor"].tolist(),
+        hovertemplate="%{customdata[0]}",
+        hoverlabel=dict(bgcolor="white", font_size=12)
+    )
+    fig.update_xaxes(
+        tickformat="%d",
+        tickmode="linear",
+        dtick=86400000.0,
+        range=[date_to_ms(first_day), date_to_ms(last_day + timedelta(days=1))]
+    )
+    fig.update_yaxes(autorange="reversed", categoryorder='array',
+                     categoryarray=[label for _, _, label in layout['rows']])
+    shapes, annotations = calendar_overlays(first_day, last_day)
+    fig.update_layout(bargap=0.2, bargroupgap=0.1, showlegend=False,
+                      shapes=shapes, annotations=annotations)
+    return fig
@@ -0,0 +1,126 @@
+# utils/import_report.py
+"""
+Měření času importu (studený start stránky) přes `python -X importtime`.
+Pro každou stránku se z jejího zdrojáku (ast) vezmou importy na úrovni modulu
+a změří se v čistém procesu – tj. cena, kterou stránka zaplatí před prvním řádkem UI.
+Vypíše celkový čas na stránku a nejdražší balíky (součet vlastních časů jejich modulů, ms), s --baseline
+i porovnání se starší verzí stromu (git archive do dočasného adresáře).
+
+    python -m utils.import_report                  # aktuální strom
+    python -m utils.import_report --baseline HEAD~1  # před / po
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = ['Home.py'] + sorted(f"pages/{p.name}" for p in (ROOT / 'pages').glob('*.py'))
+DUMMY_SECRETS = 'supabase_url = "http://localhost"\nsupabase_key = "x"\ncookie_key = "x"\n'
+
+
+def page_imports(source):
+    """
+    Importy na úrovni modulu stránky jako spustitelný kód (bez Streamlit volání).
+    """
+    tree = ast.parse(source)
+    nodes = [n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    return '\n'.join(ast.unparse(n) for n in nodes)
+
+
+def parse_importtime(stderr):
+    """
+    {balík nejvyšší úrovně: vlastní čas všech jeho modulů v µs} + celkový součet (µs).
+    Sčítá se vlastní (self) čas, takže se nic nezapočítá dvakrát.
+    """
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, _, name = line.split(':', 1)[1].split('|')
+        top = name.strip().split('.')[0]
+        packages[top] = packages.get(top, 0) + int(self_us)
+    return packages, sum(packages.values())
+
+
+def measure(tree_root, code, runs):
+    """
+    Medián `runs` měření (po jednom zahřívacím běhu kvůli .pyc). Vrátí ({balík: ms}, celkem ms).
+    """
+    with tempfile.TemporaryDirectory() as cwd:
+        os.makedirs(os.path.join(cwd, '.streamlit'))
+        with open(os.path.join(cwd, '.streamlit', 'secrets.toml'), 'w', encoding='utf-8') as f:
+            f.write(DUMMY_SECRETS)
+        # HOME = cwd: Streamlit jinak čeká (retry) na neexistující ~/.streamlit/secrets.toml
+        env = dict(os.environ, PYTHONPATH=str(tree_root), HOME=cwd)
+        results = []
+        for i in range(runs + 1):
+            proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                                  cwd=cwd, env=env, capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+            if i:
+                results.append(parse_importtime(proc.stderr))
+    packages = {}
+    for name in results[0][0]:
+        packages[name] = statistics.median(r[0].get(name, 0) for r in results) / 1000
+    return packages, statistics.median(r[1] for r in results) / 1000
+
+
+def measure_tree(tree_root, runs):
+    report = {}
+    for page in PAGES:
+        path = Path(tree_root) / page
+        if path.exists():
+            report[page] = measure(tree_root, page_imports(path.read_text(encoding='utf-8')), runs)
+    return report
+
+
+def export_tree(ref, target):
+    """
+    Rozbalí strom z gitu (ref) do adresáře target.
+    """
+    archive = subprocess.run(['git', 'archive', ref], cwd=ROOT, capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=BytesIO(archive)) as tar:
+        tar.extractall(target)
+
+
+def print_report(after, before=None, top=8):
+    if before is None:
+        print(f"{'Stránka':<26}{'import [ms]':>12}")
+    else:
+        print(f"{'Stránka':<26}{'před [ms]':>12}{'po [ms]':>12}{'rozdíl':>10}")
+    for page, (_, total) in after.items():
+        if before is None:
+            print(f"{page:<26}{total:>12.1f}")
+        elif page in before:
+            old = before[page][1]
+            print(f"{page:<26}{old:>12.1f}{total:>12.1f}{(total - old) / old * 100 if old else 0:>9.0f}%")
+    print()
+    for page, (packages, _) in after.items():
+        heaviest = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        print(f"{page}: " + ', '.join(f"{name} {ms:.0f}" for name, ms in heaviest))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Čas importu stránek Plánovače (studený start).")
+    parser.add_argument('--baseline', help="git ref pro porovnání (např. HEAD~1)")
+    parser.add_argument('--runs', type=int, default=5, help="počet měření na stránku (medián)")
+    parser.add_argument('--top', type=int, default=8, help="kolik nejdražších balíků vypsat")
+    args = parser.parse_args(argv)
+    before = None
+    if args.baseline:
+        with tempfile.TemporaryDirectory(prefix='planner_import_') as baseline_root:
+            export_tree(args.baseline, baseline_root)
+            before = measure_tree(baseline_root, args.runs)
+    print_report(measure_tree(ROOT, args.runs), before, args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+# utils/intervals.py
+"""
+Intervalový index naplánovaných úkolů po pracovištích.
+Každé pracoviště drží intervaly seřazené podle začátku (ordinal dne) a nad nimi strom
+maxim konců (segment tree). Dotaz na překryv [start, end] = bisect na poslední začátek <= end
+a sestup stromem jen do větví, jejichž maximální konec je >= start: O(k · log n),
+nezávisle na délce nejdelšího úkolu. Strom se po změnách přestaví líně při dalším dotazu (O(n),
+stejně jako vložení do seřazeného seznamu).
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+
+INDEX_FIELDS = ('id', 'project_id', 'workplace_id', 'start_date', 'end_date', 'status')
+
+
+def _ordinal(date_str):
+    return date.fromisoformat(date_str).toordinal()
+
+
+def is_scheduled(row):
+    return bool(row.get('start_date')) and bool(row.get('end_date')) and row.get('status') != 'canceled'
+
+
+class WorkplaceIntervalIndex:
+    def __init__(self):
+        self._keys = []      # seřazené (start_ord, task_id)
+        self._entries = {}   # task_id → (start_ord, end_ord, řádek)
+        self._tree = None    # maxima konců nad pozicemi v _keys; None = přestavět
+        self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, row):
+        start_ord, end_ord = _ordinal(row['start_date']), _ordinal(row['end_date'])
+        self.remove(row['id'])
+        insort(self._keys, (start_ord, row['id']))
+        self._entries[row['id']] = (start_ord, end_ord, row)
+        self._tree = None
+
+    def remove(self, task_id):
+        entry = self._entries.pop(task_id, None)
+        if entry is None:
+            return None
+        pos = bisect_left(self._keys, (entry[0], task_id))
+        del self._keys[pos]
+        self._tree = None
+        return entry[2]
+
+    def get(self, task_id):
+        entry = self._entries.get(task_id)
+        return entry[2] if entry else None
+
+    def _build_tree(self):
+        size = 1
+        while size < len(self._keys):
+            size *= 2
+        tree = [-1] * (2 * size)
+        for pos, (_, task_id) in enumerate(self._keys):
+            tree[size + pos] = self._entries[task_id][1]
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._tree, self._size = tree, size
+
+    def _positions_ending_from(self, start_ord, limit):
+        """
+        Pozice v _keys menší než limit, jejichž konec je >= start_ord (vzestupně).
+        """
+        if self._tree is None:
+            self._build_tree()
+        tree, result = self._tree, []
+        stack = [(1, 0, self._size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= limit or tree[node] < start_ord:
+                continue
+            if hi - lo == 1:
+                result.append(lo)
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+        return result
+
+    def overlapping(self, start_date, end_date, project_id=None, exclude_project=None, exclude_task=None):
+        """
+        Řádky úkolů, jejichž interval se překrývá s [start_date, end_date] (včetně hranic).
+        project_id omezí výsledek na jeden projekt, exclude_* daný projekt/úkol vynechá.
+        """
+        start_ord, end_ord = _ordinal(start_date), _ordinal(end_date)
+        if not self._keys:
+            return []
+        limit = bisect_right(self._keys, (end_ord, float('inf')))
+        result = []
+        for pos in self._positions_ending_from(start_ord, limit):
+            task_id = self._keys[pos][1]
+            row = self._entries[task_id][2]
+            if task_id == exclude_task:
+                continue
+            if project_id is not None and row['project_id'] != project_id:
+                continue
+            if exclude_project is not None and row['project_id'] == exclude_project:
+                continue
+            result.append(row)
+        return result
+
+
+class IntervalIndexRegistry:
+    """
+    Indexy všech pracovišť + zámek (sdíleno mezi sessions, aktualizuje se na místě).
+    """
+    def __init__(self, rows=()):
+        self._lock = threading.Lock()
+        self._by_wp = {}
+        self._wp_of = {}
+        for row in rows:
+            self.upsert(row)
+
+    def upsert(self, row):
+        """
+        Vloží/přesune úkol podle aktuálního řádku; nenaplánovaný nebo zrušený úkol z indexu zmizí.
+        """
+        with self._lock:
+            self._remove_locked(row['id'])
+            if is_scheduled(row):
+                entry = {k: row.get(k) for k in INDEX_FIELDS}
+                self._by_wp.setdefault(row['workplace_id'], WorkplaceIntervalIndex()).add(entry)
+                self._wp_of[row['id']] = row['workplace_id']
+
+    def update_fields(self, task_id, fields):
+        """
+        Změna polí u úkolu, který už v indexu je (update_task nezná celý řádek).
+        """
+        with self._lock:
+            wp_id = self._wp_of.get(task_id)
+            row = self._by_wp[wp_id].get(task_id) if wp_id is not None else None
+        if row is not None:
+            self.upsert({**row, **fields})
+
+    def remove(self, task_id):
+        with self._lock:
+            self._remove_locked(task_id)
+
+    def _remove_locked(self, task_id):
+        wp_id = self._wp_of.pop(task_id, None)
+        if wp_id is not None:
+            self._by_wp[wp_id].remove(task_id)
+
+    def overlapping(self, workplace_id, start_date, end_date, **filters):
+        with self._lock:
+            index = self._by_wp.get(workplace_id)
+            return index.overlapping(start_date, end_date, **filters) if index else []
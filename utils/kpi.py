@@ -0,0 +1,111 @@
+# utils/kpi.py
+"""
+KPI přehledového dashboardu v jednom průchodu.
+Úkoly se jednou převedou na typované sloupce (NumPy: posun začátku/konce ve dnech
+od dneška, hodiny, index pracoviště) a všechny agregace – běží nyní,
+začínají brzy, končí dnes, využití do konce roku, žebříček 14 dní, prognóza 30/90 dní –
+jsou vektorové operace nad nimi. Pracovní dny se berou z prefixových součtů kalendáře
+(utils.workcal), využití je podíl matic zatížení a kapacity (utils.capacity) – žádné smyčky po dnech.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+
+from utils.capacity import utilization_pct
+from utils.occupancy import load_matrix
+from utils.workcal import get_calendar
+
+UPCOMING_DAYS = 7
+RANKING_DAYS = 14
+RANKING_TOP = 5
+FORECAST_PERIODS = (30, 90)
+
+
+def task_columns(tasks, today):
+    """
+    Sloupce úkolů: start/end = posun ve dnech od today, hours, wp = index do wp_ids.
+    """
+    origin = np.datetime64(today, 'D')
+    index = {}
+    wp = [index.setdefault(t['workplace_id'], len(index)) for t in tasks]
+    return {
+        'start': (np.array([t['start_date'] for t in tasks], dtype='datetime64[D]') - origin).astype(int),
+        'end': (np.array([t['end_date'] for t in tasks], dtype='datetime64[D]') - origin).astype(int),
+        'hours': np.array([float(t['hours'] or 0) for t in tasks]),
+        'wp': np.array(wp, dtype=int),
+        'wp_ids': list(index),
+    }
+
+
+def window_end(today):
+    """
+    Poslední den, který KPI potřebují: konec roku, nebo konec nejdelší prognózy.
+    """
+    return max(date(today.year, 12, 31), today + timedelta(days=max(FORECAST_PERIODS)))
+
+
+def _status_counts(cols):
+    """
+    {wp_id: (běží nyní, začíná do 7 dní, končí dnes, končí do 24 h)}.
+    """
+    start, end, wp = cols['start'], cols['end'], cols['wp']
+    running = (start <= 0) & (end >= 0)
+    flags = np.stack([
+        running,
+        (start > 0) & (start <= UPCOMING_DAYS),
+        running & (end == 0),
+        running & (end == 1),
+    ])
+    n = len(cols['wp_ids'])
+    counts = np.stack([np.bincount(wp[f], minlength=n) for f in flags], axis=1)
+    return {wp_id: tuple(int(c) for c in counts[i]) for i, wp_id in enumerate(cols['wp_ids']) if counts[i].any()}
+
+
+def _ranking(cols):
+    """
+    Top pracoviště podle hodin v příštích RANKING_DAYS dnech (od zítřka): [(wp_id, hodiny, počet úkolů)].
+    """
+    in_window = (cols['end'] >= 1) & (cols['start'] <= RANKING_DAYS)
+    n = len(cols['wp_ids'])
+    hours = np.bincount(cols['wp'][in_window], weights=cols['hours'][in_window], minlength=n)
+    count = np.bincount(cols['wp'][in_window], minlength=n)
+    order = [i for i in np.argsort(-hours, kind='stable') if count[i]][:RANKING_TOP]
+    return [(cols['wp_ids'][i], float(hours[i]), int(count[i])) for i in order]
+
+
+def _forecast(workplace_ids, load, capacity, days):
+    """
+    Průměrné využití pracovišť (%) v příštích `days` dnech (od zítřka) = zatížení / kapacita
+    za období. Vráceno jen pro pracoviště se zatížením, sestupně.
+    """
+    period_load = load[:, 1:days + 1].sum(axis=1)
+    pct = utilization_pct(period_load, capacity[:, 1:days + 1].sum(axis=1))
+    order = [i for i in np.argsort(-pct, kind='stable') if period_load[i] > 0]
+    return [(workplace_ids[i], float(pct[i])) for i in order]
+
+
+def compute_kpis(tasks, workplace_ids, today, capacity):
+    """
+    Všechny agregace dashboardu z naplánovaných nezrušených úkolů, které dnes ještě neskončily.
+    capacity: matice kapacity [workplace_ids × dny today..window_end(today)] (utils.capacity).
+    Výsledek jsou čisté Python typy (lze cachovat přes st.cache_data).
+    """
+    cols = task_columns(tasks, today)
+    last = window_end(today)
+    load = load_matrix(tasks, workplace_ids, today, last)
+    to_year_end = (date(today.year, 12, 31) - today).days + 1
+    booked = float(load[:, :to_year_end].sum())
+    available = float(capacity[:, :to_year_end].sum())
+    holidays = np.cumsum(1 - np.frombuffer(get_calendar('24').mask(today, last), dtype=np.uint8))
+    return {
+        'status_counts': _status_counts(cols),
+        'booked_hours': booked,
+        'capacity_hours': available,
+        'utilization': float(utilization_pct(booked, available)),
+        'ranking': _ranking(cols),
+        'forecast': {
+            days: {'holidays': int(holidays[days] - holidays[0]),
+                   'load': _forecast(workplace_ids, load, capacity, days)}
+            for days in FORECAST_PERIODS
+        },
+    }
@@ -0,0 +1,79 @@
+# utils/occupancy.py
+"""
+Obsazenost pracovišť po dnech jako NumPy matice [pracoviště × den].
+Hodiny úkolu se rozprostřou rovnoměrně do jeho pracovních dní (celého úkolu):
+přes rozdílové pole (+h na startu, −h za koncem) a cumsum se dostane denní sazba,
+kterou pak maska pracovních dní vynuluje ve volných dnech. Vše za jeden průchod.
+"""
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+
+from utils.workcal import CALENDAR_START, get_calendar
+
+MONTH_NAMES = ['Led', 'Úno', 'Bře', 'Dub', 'Kvě', 'Čer', 'Čvc', 'Srp', 'Zář', 'Říj', 'Lis', 'Pro']
+
+
+def month_start_indices(year):
+    first = date(year, 1, 1)
+    return np.array([(date(year, m, 1) - first).days for m in range(1, 13)])
+
+
+@lru_cache(maxsize=None)
+def _working_prefix(skip_weekends):
+    """
+    Prefixové součty pracovních dní kalendáře (utils.workcal) jako NumPy pole.
+    """
+    return np.asarray(get_calendar('7.5' if skip_weekends else '24').cum)
+
+
+def load_matrix(tasks, workplace_ids, first, last):
+    """
+    tasks: řádky s workplace_id, hours, capacity_mode, start_date, end_date (ISO).
+    Vrátí matici hodin tvaru (len(workplace_ids), dny [first, last]). Denní sazba úkolu =
+    hodiny / pracovní dny celého úkolu, takže úkol přesahující okno do něj dá jen svůj podíl.
+    """
+    n_days = (last - first).days + 1
+    offset = (first - CALENDAR_START).days
+    row_of = {wp_id: i for i, wp_id in enumerate(workplace_ids)}
+    matrix = np.zeros((len(workplace_ids), n_days))
+    by_mode = {}
+    for t in tasks:
+        if t['workplace_id'] in row_of:
+            by_mode.setdefault(t['capacity_mode'] == '7.5', []).append(t)
+    origin = np.datetime64(CALENDAR_START, 'D')
+    for skip_weekends, group in by_mode.items():
+        mask = np.frombuffer(get_calendar('7.5' if skip_weekends else '24').mask(first, last),
+                             dtype=np.uint8).astype(float)
+        cum = _working_prefix(skip_weekends)
+        starts = (np.array([t['start_date'] for t in group], dtype='datetime64[D]') - origin).astype(int)
+        ends = (np.array([t['end_date'] for t in group], dtype='datetime64[D]') - origin).astype(int)
+        starts, ends = np.clip(starts, 0, len(cum) - 2), np.clip(ends, 0, len(cum) - 2)
+        hours = np.array([float(t['hours'] or 0) for t in group])
+        rows = np.array([row_of[t['workplace_id']] for t in group])
+        working_days = cum[ends + 1] - cum[starts]
+        keep = (working_days > 0) & (ends >= offset) & (starts < offset + n_days)
+        rate = hours[keep] / working_days[keep]
+        rows = rows[keep]
+        first_day = np.clip(starts[keep] - offset, 0, n_days - 1)
+        last_day = np.clip(ends[keep] - offset, 0, n_days - 1)
+        diff = np.zeros((len(workplace_ids), n_days + 1))
+        np.add.at(diff, (rows, first_day), rate)
+        np.add.at(diff, (rows, last_day + 1), -rate)
+        matrix += np.cumsum(diff[:, :n_days], axis=1) * mask
+    return matrix
+
+
+def occupancy_matrix(tasks, workplace_ids, year):
+    """
+    Matice hodin [pracoviště × den] pro kalendářní rok.
+    """
+    return load_matrix(tasks, workplace_ids, date(year, 1, 1), date(year, 12, 31))
+
+
+def monthly_hours(matrix, year):
+    """
+    Součet matice po měsících → tvar (pracoviště, 12).
+    """
+    return np.add.reduceat(matrix, month_start_indices(year), axis=1)
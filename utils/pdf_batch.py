@@ -0,0 +1,91 @@
+# utils/pdf_batch.py
+"""
+Hromadný PDF report HMG (čtvrtletí / rok) – každý měsíc se kreslí v samostatném
+procesu (ProcessPoolExecutor) stejným kódem jako export jednoho měsíce a výsledky
+se spojí do jednoho PDF. Měsíc s mnoha drahami se zalomí na více stran.
+Worker dostává jen čistá data (úkoly, projekty, názvy pracovišť) – žádné DB ani Streamlit.
+
+Headless použití (plánované úlohy):
+    python -m utils.pdf_batch 2025-01 2025-12 -o HMG_2025.pdf
+"""
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from io import BytesIO
+
+from pypdf import PdfWriter
+
+from utils.pdf_export import render_month_pdf
+
+MAX_ROWS_PER_PAGE = 30
+MAX_WORKERS = 4
+
+
+def report_file_name(date_from, date_to):
+    return f"HMG_report_{date_from:%Y_%m}-{date_to:%Y_%m}.pdf"
+
+
+def render_month_job(job):
+    """
+    Worker: job = (rok, měsíc, úkoly, projekty, {workplace_id: název}) → bytes PDF měsíce.
+    """
+    year, month, tasks, projects, wp_names = job
+    return render_month_pdf(
+        year, month, tasks, projects,
+        lambda wp_id: wp_names.get(wp_id, f"ID {wp_id}"),
+        max_rows_per_page=MAX_ROWS_PER_PAGE
+    )
+
+
+def merge_pdfs(parts):
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(BytesIO(part))
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def render_report(jobs, progress=None, max_workers=MAX_WORKERS):
+    """
+    Vykreslí měsíce paralelně a spojí je v pořadí jobs do jednoho PDF (bytes).
+    progress(hotovo, celkem) se volá v hlavním vlákně po každém dokončeném měsíci.
+    """
+    parts = [None] * len(jobs)
+    # spawn – fork z vícevláknového serveru (Streamlit) není bezpečný
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+        futures = {pool.submit(render_month_job, job): i for i, job in enumerate(jobs)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            parts[futures[future]] = future.result()
+            if progress:
+                progress(done, len(jobs))
+    return merge_pdfs(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hromadný PDF report HMG po měsících.")
+    parser.add_argument('date_from', help="první měsíc YYYY-MM")
+    parser.add_argument('date_to', help="poslední měsíc YYYY-MM")
+    parser.add_argument('-o', '--output', help="cílový soubor (výchozí HMG_report_<od>-<do>.pdf)")
+    parser.add_argument('-j', '--workers', type=int, default=MAX_WORKERS)
+    args = parser.parse_args(argv)
+    date_from = date.fromisoformat(f"{args.date_from}-01")
+    date_to = date.fromisoformat(f"{args.date_to}-01")
+    # Data z DB – až tady, aby workery nenačítaly Supabase klienta
+    from utils.common import month_report_jobs
+    jobs = month_report_jobs(date_from, date_to)
+    pdf_bytes = render_report(
+        jobs,
+        progress=lambda done, total: print(f"{done}/{total} měsíců hotovo", flush=True),
+        max_workers=args.workers
+    )
+    output = args.output or report_file_name(date_from, date_to)
+    with open(output, 'wb') as f:
+        f.write(pdf_bytes)
+    print(f"Uloženo: {output}")
+
+
+if __name__ == '__main__':
+    main()
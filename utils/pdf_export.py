@@ -0,0 +1,165 @@
+# utils/pdf_export.py
+"""
+PDF export HMG měsíční – kreslí se do paměti (BytesIO), nic se nezapisuje na disk.
+Pruhy se předem seskupí podle (pracoviště, dráha), takže kreslení řádku projde jen
+jeho vlastní úkoly. Font s diakritikou se registruje jednou za proces.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from functools import lru_cache
+from io import BytesIO
+
+from reportlab.lib.pagesizes import landscape, A4
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas as pdf_canvas
+
+from utils.collisions import compute_collisions
+from utils.gantt import build_layout
+from utils.workcal import is_holiday
+
+COLLISION_COLOR = '#EA4335'
+DEFAULT_COLOR = '#4285F4'
+FIXED_COLORS_RGB = {
+    '#34A853': (0.20, 0.66, 0.32),
+    COLLISION_COLOR: (0.92, 0.26, 0.21),
+}
+FALLBACK_RGB = (0.26, 0.52, 0.96)
+
+
+@lru_cache(maxsize=None)
+def pdf_font():
+    """
+    Registrace fontu pro diakritiku (jednou za proces). Vrátí název fontu, bez DejaVu 'Helvetica'.
+    """
+    try:
+        pdfmetrics.registerFont(TTFont('DejaVu', 'DejaVuSans.ttf'))
+        return 'DejaVu'
+    except Exception:
+        return 'Helvetica'
+
+
+def _hex_to_rgb(hex_color):
+    return tuple(int(hex_color[i:i + 2], 16) / 255 for i in (1, 3, 5))
+
+
+def _is_weekend_or_holiday(d):
+    return d.weekday() >= 5 or is_holiday(d)
+
+
+def month_pdf_file_name(year, month):
+    return f"HMG_mesicni_{year}_{month:02d}.pdf"
+
+
+def _month_bars(tasks, layout, projects, first_day, last_day):
+    """
+    Pruhy pro PDF seskupené podle (pracoviště, dráha).
+    """
+    tasks_by_id = {t['id']: t for t in tasks}
+    collisions = compute_collisions(tasks)
+    bars = defaultdict(list)
+    for wp, wp_tasks in layout['tasks_by_wp'].items():
+        for t in wp_tasks:
+            start_date = date.fromisoformat(t['start_date'])
+            end_date = date.fromisoformat(t['end_date'])
+            proj = projects.get(t['project_id'], {'name': f'P{t["project_id"]}', 'color': DEFAULT_COLOR})
+            task_text = proj['name']
+            colliding = collisions.get(t['id'])
+            if colliding:
+                task_text += " !"
+                display_color = COLLISION_COLOR
+                if any(tasks_by_id[cid]['project_id'] != t['project_id'] for cid in colliding):
+                    task_text += " !"
+            else:
+                display_color = proj['color']
+            bars[(wp, layout['lane_of'][t['id']])].append({
+                'task_text': task_text,
+                'start_day': (max(start_date, first_day) - first_day).days + 1,
+                'end_day': (min(end_date, last_day) - first_day).days + 1,
+                'color': display_color,
+            })
+    return bars
+
+
+def render_month_pdf(year, month, tasks, projects, wp_name_fn, layout=None, max_rows_per_page=None):
+    """
+    HMG měsíční jako PDF (bytes).
+    tasks: naplánované nezrušené úkoly zasahující do měsíce,
+    projects: {project_id: {'name', 'color'}}, wp_name_fn: workplace_id → název.
+    max_rows_per_page: None = vše na jednu stranu (řádky se zúží), jinak se dráhy zalomí na další strany.
+    """
+    first_day = date(year, month, 1)
+    num_days = calendar.monthrange(year, month)[1]
+    last_day = first_day + timedelta(days=num_days - 1)
+    layout = layout or build_layout(tasks, wp_name_fn)
+    bars = _month_bars(tasks, layout, projects, first_day, last_day)
+    colors_rgb = {p['color']: _hex_to_rgb(p['color']) for p in projects.values()}
+    colors_rgb.update(FIXED_COLORS_RGB)
+    rows = layout['rows']
+    page_size = max_rows_per_page or max(len(rows), 1)
+    pages = [rows[i:i + page_size] for i in range(0, len(rows), page_size)] or [[]]
+
+    buffer = BytesIO()
+    pdf = pdf_canvas.Canvas(buffer, pagesize=landscape(A4))
+    for page_no, page_rows in enumerate(pages, start=1):
+        title = f"HMG HK – {calendar.month_name[month]} {year}"
+        if len(pages) > 1:
+            title += f" ({page_no}/{len(pages)})"
+        _draw_month_page(pdf, title, first_day, num_days, page_rows, min(len(rows), page_size),
+                         bars, colors_rgb)
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def _draw_month_page(pdf, title, first_day, num_days, page_rows, rows_per_page, bars, colors_rgb):
+    font = pdf_font()
+    width, height = landscape(A4)
+    pdf.setFont(font, 16)
+    pdf.drawCentredString(width / 2, height - 0.8 * inch, title)
+    left_margin = 1.0 * inch
+    wp_col_width = 2.0 * inch
+    day_col_width = (width - left_margin - wp_col_width - 0.8 * inch) / num_days
+    header_y = height - 1.5 * inch
+    row_height = (height - 2.5 * inch) / rows_per_page if rows_per_page > 0 else 40
+    # Hlavička dnů (víkendy a svátky červeně)
+    pdf.setFont(font, 10)
+    days = [first_day + timedelta(days=d) for d in range(num_days)]
+    off_days = [d for d in days if _is_weekend_or_holiday(d)]
+    for d in days:
+        x = left_margin + wp_col_width + (d.day - 1) * day_col_width
+        fill_color = (1, 0, 0) if d in off_days else (0, 0, 0)
+        pdf.setFillColorRGB(*fill_color)
+        pdf.drawCentredString(x + day_col_width / 2, header_y, str(d.day))
+    pdf.setStrokeColorRGB(0, 0, 0)
+    pdf.line(left_margin + wp_col_width, header_y - 10, width - 0.8 * inch, header_y - 10)
+    # Šedé pozadí sloupců víkendů a svátků
+    grid_bottom_y = header_y - 20 - len(page_rows) * row_height
+    pdf.setFillColorRGB(0.9, 0.9, 0.9)
+    for off_day in off_days:
+        x1 = left_margin + wp_col_width + (off_day.day - 1) * day_col_width
+        pdf.rect(x1, grid_bottom_y, day_col_width, header_y - 10 - grid_bottom_y, fill=1, stroke=0)
+    # Řádky pracovišť / drah (název pracoviště u první dráhy na straně)
+    previous_wp = None
+    for current_row, (wp_name, lane, _) in enumerate(page_rows):
+        y_top = header_y - 20 - current_row * row_height
+        y_bottom = y_top - row_height
+        pdf.setFillColorRGB(0, 0, 0)
+        pdf.setFont(font, 9)
+        if wp_name != previous_wp:
+            pdf.drawString(left_margin, y_top - row_height / 2 - 3, wp_name)
+            previous_wp = wp_name
+        pdf.line(left_margin, y_bottom, width - 0.8 * inch, y_bottom)
+        for item in bars.get((wp_name, lane), ()):
+            x1 = left_margin + wp_col_width + (item['start_day'] - 1) * day_col_width
+            x2 = left_margin + wp_col_width + item['end_day'] * day_col_width
+            pdf.setFillColorRGB(*colors_rgb.get(item['color'], FALLBACK_RGB))
+            pdf.rect(x1, y_bottom + 5, x2 - x1, row_height - 10, fill=1, stroke=1)
+            if item['color'] == COLLISION_COLOR:
+                pdf.setFillColorRGB(1, 1, 1)
+            else:
+                pdf.setFillColorRGB(0, 0, 0)
+            pdf.setFont(font, 8)
+            pdf.drawCentredString((x1 + x2) / 2, y_bottom + row_height / 2 - 4, item['task_text'])
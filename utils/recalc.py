@@ -0,0 +1,71 @@
+# utils/recalc.py
+"""
+Přepočet termínů v závislostním stromu úkolů – celý v paměti, bez DB dotazů.
+Pravidla odpovídají původnímu rekurzivnímu recalculate_from_task:
+  * zrušený úkol nebo úkol bez startu → end_date = None, děti dostanou start None
+  * jinak end_date = calculate_end_date(...), děti startují další pracovní den
+  * zrušené děti (a jejich podstromy) se přeskakují
+  * je-li parent done/canceled a dítě má custom_start, start dítěte se nepřepisuje
+"""
+from collections import deque
+
+DATE_FIELDS = ('start_date', 'end_date')
+
+
+def reachable(tasks_by_id, children_of, start_ids):
+    """
+    ID úkolů, kterých se přepočet od start_ids týká (zrušené děti a jejich podstromy ne).
+    """
+    seen = set()
+    stack = [tid for tid in start_ids if tid in tasks_by_id]
+    while stack:
+        tid = stack.pop()
+        if tid in seen:
+            continue
+        seen.add(tid)
+        for child_id in children_of.get(tid, ()):
+            child = tasks_by_id.get(child_id)
+            if child and child['status'] != 'canceled':
+                stack.append(child_id)
+    return seen
+
+
+def plan_recalculation(tasks_by_id, children_of, start_ids, end_date_fn, next_day_fn):
+    """
+    Projde DAG od start_ids iterativně v topologickém pořadí (Kahn).
+    tasks_by_id: {task_id: řádek tasks}, children_of: {parent_id: [task_id, ...]}
+    Vrátí {task_id: {pole: nová hodnota}} jen pro řádky, kde se datum změnilo.
+    """
+    scope = reachable(tasks_by_id, children_of, start_ids)
+    indegree = dict.fromkeys(scope, 0)
+    for tid in scope:
+        for child_id in children_of.get(tid, ()):
+            if child_id in scope:
+                indegree[child_id] += 1
+    state = {tid: {f: tasks_by_id[tid].get(f) for f in DATE_FIELDS} for tid in scope}
+    queue = deque(tid for tid in start_ids if tid in scope and indegree[tid] == 0)
+    while queue:
+        tid = queue.popleft()
+        task = tasks_by_id[tid]
+        current = state[tid]
+        if task['status'] == 'canceled' or not current['start_date']:
+            current['end_date'] = None
+            child_start = None
+        else:
+            current['end_date'] = end_date_fn(current['start_date'], task['hours'], task['capacity_mode'])
+            child_start = next_day_fn(current['end_date'], task['capacity_mode'])
+        keep_custom = task['status'] in ('done', 'canceled')
+        for child_id in children_of.get(tid, ()):
+            if child_id not in scope:
+                continue
+            if not (keep_custom and tasks_by_id[child_id].get('custom_start', False)):
+                state[child_id]['start_date'] = child_start
+            indegree[child_id] -= 1
+            if indegree[child_id] == 0:
+                queue.append(child_id)
+    changes = {}
+    for tid, new_values in state.items():
+        diff = {f: v for f, v in new_values.items() if tasks_by_id[tid].get(f) != v}
+        if diff:
+            changes[tid] = diff
+    return changes
@@ -0,0 +1,52 @@
+# utils/session_token.py
+"""
+Podepsaný session token v cookie: base64url(JSON) + "." + HMAC-SHA256.
+Nese username, jméno, roli (jen jako nápověda – platnou roli dodá DB) a expiraci.
+Bez platného podpisu / po expiraci = None.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+TOKEN_TTL = 60 * 60 * 24 * 90  # sekundy – stejně jako původní cookie
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _signature(body, key):
+    return _b64encode(hmac.new(key.encode('utf-8'), body.encode('ascii'), hashlib.sha256).digest())
+
+
+def issue_token(claims, key, ttl=TOKEN_TTL):
+    """
+    claims: dict (username, name, role); doplní se 'exp'.
+    """
+    payload = dict(claims, exp=int(time.time()) + ttl)
+    body = _b64encode(json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+    return f"{body}.{_signature(body, key)}"
+
+
+def verify_token(token, key):
+    """
+    Vrátí claims z platného tokenu, jinak None (chybný formát, podpis nebo expirace).
+    """
+    if not token or not isinstance(token, str) or '.' not in token:
+        return None
+    body, signature = token.rsplit('.', 1)
+    try:
+        if not hmac.compare_digest(signature.encode('utf-8'), _signature(body, key).encode('ascii')):
+            return None
+        claims = json.loads(_b64decode(body))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(claims, dict) or claims.get('exp', 0) < time.time():
+        return None
+    return claims
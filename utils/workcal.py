@@ -0,0 +1,175 @@
+# utils/workcal.py
+"""
+Kalendář pracovních dní s předpočítanými prefixovými součty.
+Pro každý režim kapacity ('7.5' = bez víkendů a svátků, ostatní = bez svátků)
+se jednou postaví bitmapa pracovních dní a kumulativní počty přes okno
+CALENDAR_START..CALENDAR_END. Konec úkolu, další pracovní den i počet pracovních
+dní v rozsahu jsou pak O(1) / O(log n). Mimo okno se počítá postaru po dnech.
+"""
+import math
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+CALENDAR_START = date(2000, 1, 1)
+CALENDAR_END = date(2100, 12, 31)
+
+
+def get_easter(year):
+    a = year % 19
+    b = year // 100
+    c = year % 100
+    d = (19 * a + b - b // 4 - ((b - (b + 8) // 25 + 1) // 3) + 15) % 30
+    e = (32 + 2 * (b % 4) + 2 * (c // 4) - d - (c % 4)) % 7
+    f = d + e - 7 * ((a + 11 * d + 22 * e) // 451) + 114
+    month = f // 31
+    day = f % 31 + 1
+    easter_sunday = date(year, month, day)
+    return easter_sunday + timedelta(days=1)
+
+
+def get_holidays(year):
+    return [
+        date(year, 1, 1),
+        get_easter(year),
+        date(year, 5, 1),
+        date(year, 5, 8),
+        date(year, 7, 5),
+        date(year, 7, 6),
+        date(year, 9, 28),
+        date(year, 10, 28),
+        date(year, 11, 17),
+        date(year, 12, 24),
+        date(year, 12, 25),
+        date(year, 12, 26),
+    ]
+
+
+def weekends_off(mode):
+    return mode == '7.5'
+
+
+def capacity_per_day(mode):
+    return 7.5 if mode == '7.5' else 24.0
+
+
+@lru_cache(maxsize=None)
+def _holiday_flags():
+    flags = bytearray((CALENDAR_END - CALENDAR_START).days + 1)
+    for year in range(CALENDAR_START.year, CALENDAR_END.year + 1):
+        for h in get_holidays(year):
+            flags[(h - CALENDAR_START).days] = 1
+    return flags
+
+
+class WorkingCalendar:
+    """
+    Bitmapa pracovních dní + prefixové součty pro jeden režim (víkendy volné ano/ne).
+    cum[i] = počet pracovních dní v [CALENDAR_START, CALENDAR_START + i).
+    """
+    def __init__(self, skip_weekends):
+        self.skip_weekends = skip_weekends
+        holidays = _holiday_flags()
+        first_weekday = CALENDAR_START.weekday()
+        self.flags = bytearray(len(holidays))
+        self.cum = [0] * (len(holidays) + 1)
+        running = 0
+        for i, is_hol in enumerate(holidays):
+            working = not is_hol and not (skip_weekends and (first_weekday + i) % 7 >= 5)
+            self.flags[i] = working
+            running += working
+            self.cum[i + 1] = running
+
+    def _index(self, d):
+        if isinstance(d, datetime):
+            d = d.date()
+        i = (d - CALENDAR_START).days
+        return i if 0 <= i < len(self.flags) else None
+
+    def _slow_is_working(self, d):
+        if self.skip_weekends and d.weekday() >= 5:
+            return False
+        return d not in get_holidays(d.year)
+
+    def is_working_day(self, d):
+        i = self._index(d)
+        return bool(self.flags[i]) if i is not None else self._slow_is_working(d)
+
+    def mask(self, start, end):
+        """
+        Bitmapa (bytes, 1 = pracovní den) pro dny [start, end] včetně.
+        """
+        i, j = self._index(start), self._index(end)
+        if i is None or j is None:
+            return bytes(self.is_working_day(start + timedelta(days=k))
+                         for k in range((end - start).days + 1))
+        return bytes(self.flags[i:j + 1])
+
+    def count(self, start, end):
+        """
+        Počet pracovních dní v [start, end] včetně.
+        """
+        if end < start:
+            return 0
+        i, j = self._index(start), self._index(end)
+        if i is None or j is None:
+            return sum(1 for k in range((end - start).days + 1)
+                       if self.is_working_day(start + timedelta(days=k)))
+        return self.cum[j + 1] - self.cum[i]
+
+    def nth_working_day(self, start, n):
+        """
+        n-tý pracovní den (n >= 1) počítáno od start včetně.
+        """
+        i = self._index(start)
+        if i is not None:
+            p = bisect_left(self.cum, self.cum[i] + n)
+            if p < len(self.cum):
+                return CALENDAR_START + timedelta(days=p - 1)
+        current, found = start, 0
+        while True:
+            if self.is_working_day(current):
+                found += 1
+                if found == n:
+                    return current
+            current += timedelta(days=1)
+
+    def end_date(self, start, hours, mode):
+        days_needed = math.ceil(hours / capacity_per_day(mode))
+        if days_needed <= 0:
+            # Původní smyčka neproběhla ani jednou → den před startem
+            return start - timedelta(days=1)
+        return self.nth_working_day(start, days_needed)
+
+    def next_working_day_after(self, d):
+        return self.nth_working_day(d + timedelta(days=1), 1)
+
+
+@lru_cache(maxsize=None)
+def _calendar(skip_weekends):
+    return WorkingCalendar(skip_weekends)
+
+
+def get_calendar(mode):
+    return _calendar(weekends_off(mode))
+
+
+def is_holiday(dt):
+    if isinstance(dt, datetime):
+        dt = dt.date()
+    i = (dt - CALENDAR_START).days
+    if 0 <= i < len(_holiday_flags()):
+        return bool(_holiday_flags()[i])
+    return dt in get_holidays(dt.year)
+
+
+def months_in_range(date_from, date_to):
+    """
+    Seznam (rok, měsíc) od měsíce date_from do měsíce date_to včetně.
+    """
+    y, m = date_from.year, date_from.month
+    months = []
+    while (y, m) <= (date_to.year, date_to.month):
+        months.append((y, m))
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return months